@@ -0,0 +1,40 @@
+# LED Strip
+import asyncio
+from led_animation_seq import LedStripAnimationSeq
+LED_STRIP_PIN = 12
+LED_STRIP_COUNT = 20
+
+# LED Strip Animation
+led_strip_seq = None
+animation_seq = [
+    ['blink', 5000],
+    ['move_up_with_tail', 5000, {"speed": 50, "active_count": 1, "colors": (100, 100, 100)}],
+    ['move_down_with_tail', 5000, {"speed": 50, "active_count": 1, "colors": (100, 100, 100)}],
+    ['none', 5000, {"active_count": 1, "colors": (100, 100, 100)}],
+]
+other_animation_seq = [
+    ['breath', 0, {"speed": 50, "is_alternate": True}],
+]
+
+# functions
+async def other_task():
+    global led_strip_seq
+    while True:
+        await asyncio.sleep_ms(30000)
+        # change the animation from other task
+        led_strip_seq.post_event("update", other_animation_seq)
+        await asyncio.sleep_ms(10000)
+        led_strip_seq.post_event("update", animation_seq)
+
+async def main():
+    global led_strip_seq
+    led_strip_seq = LedStripAnimationSeq(LED_STRIP_PIN,
+                                         LED_STRIP_COUNT,
+                                         animation_seq)
+    asyncio.create_task(other_task())
+    # run until "stop" event is posted
+    await led_strip_seq.run()
+
+
+# main program start
+asyncio.run(main())
@@ -0,0 +1,33 @@
+# LED Strips
+import time
+from led_animation_seq import LedStripAnimationSeq, LedStripAnimationController
+LED_STRIP_PINS = (12, 13, 14, 15)
+LED_STRIP_COUNT = 20
+
+# LED Strip Animation
+controller = None
+animation_seq = [
+    ['blink', 5000],
+    ['move_up_with_tail', 5000, {"speed": 50, "active_count": 1, "colors": (100, 100, 100)}],
+    ['breath', 5000, {"speed": 50, "is_alternate": True}],
+]
+
+# functions
+def init_setup():
+    global controller
+    led_strip_seqs = [LedStripAnimationSeq(pin, LED_STRIP_COUNT, animation_seq, fixed_rate = True) for pin in LED_STRIP_PINS]
+    controller = LedStripAnimationController(led_strip_seqs)
+
+def main_loop():
+    global controller
+    # check all strips, return the time until the next event
+    wait_ms = controller.check_event()
+    if (wait_ms is not None) and (wait_ms > 0):
+        # sleep instead of busy polling, "machine.lightsleep" can also be used here
+        time.sleep_ms(wait_ms)
+
+
+# main program start
+init_setup()
+while True:
+    main_loop()
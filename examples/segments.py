@@ -0,0 +1,45 @@
+# LED Strip
+import time
+from led_animation_seq import LedDriverWrapper, LedStripSegments, LedStripAnimationSeq, LedStripAnimationController
+LED_STRIP_PIN = 12
+LED_STRIP_COUNT = 60
+
+# LED Strip Animation
+controller = None
+segments = None
+zone_a_seq = [
+    ['move_down_with_tail', 5000, {"speed": 50, "active_count": 2, "colors": (100, 100, 100)}],
+    ['breath', 5000, {"speed": 50}],
+]
+zone_b_seq = [
+    ['fill_and_move', 5000, {"speed": 100, "direction": "up", "colors": ((100, 0, 0), (0, 100, 0), (0, 0, 100))}],
+    ['blink', 5000, {"is_alternate": True}],
+]
+
+# functions
+def init_setup():
+    global controller, segments
+    led_driver = LedDriverWrapper(None, LED_STRIP_PIN, LED_STRIP_COUNT)
+    segments = LedStripSegments(led_driver)
+    # first 20 LEDs and the remaining LEDs (counted from the end of the strip)
+    zone_a = segments.add_segment(0, 20)
+    zone_b = segments.add_segment(20, LED_STRIP_COUNT - 20, reverse = True)
+    controller = LedStripAnimationController([
+        LedStripAnimationSeq(None, None, zone_a_seq, led_driver = zone_a),
+        LedStripAnimationSeq(None, None, zone_b_seq, led_driver = zone_b),
+    ])
+    segments.write()
+
+def main_loop():
+    global controller, segments
+    wait_ms = controller.check_event()
+    # send the strip once for all zones
+    segments.write()
+    if (wait_ms is not None) and (wait_ms > 0):
+        time.sleep_ms(wait_ms)
+
+
+# main program start
+init_setup()
+while True:
+    main_loop()
@@ -0,0 +1,122 @@
+# Optional accelerated byte loops for led_animation_seq
+# led_animation_seq use these kernels when this module can be imported, otherwise the pure Python loops
+#   MicroPython: @micropython.viper implementations (the firmware need the viper code emitter)
+#   CPython: NumPy vectorized implementations if NumPy is installed
+# all kernels work on bytearray (or memoryview) LED buffers and "bytes" lookup tables of 256 entries,
+# with the same arguments as the pure Python versions in led_animation_seq
+import sys
+
+kernels_available = False
+kernel_type = None
+
+if (sys.implementation.name == "micropython"):
+    import micropython
+
+    # dst = lut[src]
+    @micropython.viper
+    def blend_copy(dst, src, lut):
+        d = ptr8(dst)
+        s = ptr8(src)
+        t = ptr8(lut)
+        n = int(len(dst))
+        i = 0
+        while i < n:
+            d[i] = t[s[i]]
+            i += 1
+
+    # dst = min(dst + lut[src], 255)
+    @micropython.viper
+    def blend_add(dst, src, lut):
+        d = ptr8(dst)
+        s = ptr8(src)
+        t = ptr8(lut)
+        n = int(len(dst))
+        i = 0
+        while i < n:
+            v = d[i] + t[s[i]]
+            if v > 255:
+                v = 255
+            d[i] = v
+            i += 1
+
+    # dst = max(dst, lut[src])
+    @micropython.viper
+    def blend_max(dst, src, lut):
+        d = ptr8(dst)
+        s = ptr8(src)
+        t = ptr8(lut)
+        n = int(len(dst))
+        i = 0
+        while i < n:
+            v = t[s[i]]
+            if v > d[i]:
+                d[i] = v
+            i += 1
+
+    # dst = lut[src] + dst_lut[dst]
+    @micropython.viper
+    def blend_alpha(dst, src, lut, dst_lut):
+        d = ptr8(dst)
+        s = ptr8(src)
+        t = ptr8(lut)
+        u = ptr8(dst_lut)
+        n = int(len(dst))
+        i = 0
+        while i < n:
+            d[i] = t[s[i]] + u[d[i]]
+            i += 1
+
+    # dst[dst_offset + k * step] = lut[src[src_offset + k * step]]
+    # viper functions can only take 4 arguments on some ports, so the offsets and step are packed in one int
+    # "params" is dst_offset | src_offset << 8 | step << 16 (each less than 256)
+    @micropython.viper
+    def apply_channel_lut_packed(dst, src, lut, params: int):
+        d = ptr8(dst)
+        s = ptr8(src)
+        t = ptr8(lut)
+        n = int(len(src))
+        dst_offset = params & 0xFF
+        src_offset = (params >> 8) & 0xFF
+        step = (params >> 16) & 0xFF
+        while src_offset < n:
+            d[dst_offset] = t[s[src_offset]]
+            src_offset += step
+            dst_offset += step
+
+    def apply_channel_lut(dst, dst_offset, src, src_offset, step, lut):
+        apply_channel_lut_packed(dst, src, lut, dst_offset | (src_offset << 8) | (step << 16))
+
+    kernels_available = True
+    kernel_type = "viper"
+else:
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+
+    if (numpy is not None):
+        def as_array(buf):
+            return numpy.frombuffer(buf, dtype = numpy.uint8)
+
+        def blend_copy(dst, src, lut):
+            as_array(dst)[:] = as_array(lut)[as_array(src)]
+
+        def blend_add(dst, src, lut):
+            d = as_array(dst)
+            numpy.minimum(d.astype(numpy.uint16) + as_array(lut)[as_array(src)], 255, out = d, casting = "unsafe")
+
+        def blend_max(dst, src, lut):
+            d = as_array(dst)
+            numpy.maximum(d, as_array(lut)[as_array(src)], out = d)
+
+        def blend_alpha(dst, src, lut, dst_lut):
+            d = as_array(dst)
+            d[:] = as_array(lut)[as_array(src)] + as_array(dst_lut)[d]
+
+        def apply_channel_lut(dst, dst_offset, src, src_offset, step, lut):
+            # only as many bytes as "src" has, "dst" can be longer
+            count = (len(src) - src_offset + step - 1) // step
+            as_array(dst)[dst_offset:dst_offset + count * step:step] = as_array(lut)[as_array(src)[src_offset::step]]
+
+        kernels_available = True
+        kernel_type = "numpy"
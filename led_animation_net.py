@@ -0,0 +1,194 @@
+# Network frame sink for led_animation_seq, import this module to add the "udp_frame" animation
+#
+# The frames are received by UDP in DDP (Distributed Display Protocol) like packets:
+#   byte 0: flags, 0x40 (version 1) | 0x01 (push, the last packet of the frame)
+#   byte 1: sequence number 1 - 15 (0 to disable the check)
+#   byte 2: data type, byte 3: destination id (not used)
+#   byte 4 - 7: data offset in the frame (bytes, big endian)
+#   byte 8 - 9: data length (bytes, big endian)
+#   byte 10 - : pixel data in "color_order" (e.g. RGB RGB ...)
+# a frame can be split into several packets, it is shown when the packet with push flag is received
+try:
+    import socket
+except ImportError:
+    import usocket as socket
+import struct
+from time import ticks_ms, ticks_diff
+from led_animation_seq import add_led_strip_animation, LedAnimationState, LedStripAnimation, LedFrameCopier
+
+DDP_PORT = 4048
+DDP_HEADER = ">BBBBIH"
+DDP_HEADER_SIZE = 10
+DDP_VERSION = 0x40
+DDP_VERSION_MASK = 0xC0
+DDP_PUSH = 0x01
+DDP_MAX_DATA = 1440
+
+# create a non-blocking UDP socket listening on "port"
+def create_udp_socket(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(socket.getaddrinfo("0.0.0.0", port)[0][-1])
+    sock.setblocking(False)
+    return sock
+
+# receive frames from UDP, show a local animation when no frame is received for a while
+# attributes:
+#   "port": UDP port (default 4048), or "socket" to use a non-blocking socket created by the user
+#   "speed": ms between checking the socket (default 10)
+#   "color_order": byte order of the pixel data (default "RGB")
+#   "timeout": ms without frame to change to the fallback animation (default 1000)
+#   "fallback": [name, attributes] of the local animation (default ["none", None], i.e. all LEDs off)
+#   "max_packets": packets read in each check at most (default 16), older frames in the same check are dropped
+class LedUdpFrameState(LedAnimationState):
+    __slots__ = ("port", "sock", "recv_into", "packet", "packet_view", "frame", "frame_view", "copier",
+                 "last_sequence", "last_frame_ms", "timeout", "max_packets", "fallback_animation",
+                 "fallback_active", "frame_count", "dropped_count")
+
+    def __init__(self, next_delay = None):
+        self.next_delay = next_delay
+
+def udp_frame_setup(led_driver, attributes):
+    if (attributes is None):
+        attributes = {}
+    state = LedUdpFrameState(attributes.get("speed", 10))
+    state.port = attributes.get("port", DDP_PORT)
+    state.sock = attributes.get("socket", None)
+    state.packet = bytearray(DDP_HEADER_SIZE + DDP_MAX_DATA)
+    state.packet_view = memoryview(state.packet)
+    state.frame = bytearray(len(led_driver) * led_driver.bpp)
+    state.frame_view = memoryview(state.frame)
+    state.copier = LedFrameCopier(led_driver, attributes.get("color_order", "RGB"), len(state.frame))
+    state.timeout = attributes.get("timeout", 1000)
+    state.max_packets = attributes.get("max_packets", 16)
+    fallback = attributes.get("fallback", ("none", None))
+    state.fallback_animation = LedStripAnimation(led_driver, fallback[0], fallback[1] if len(fallback) > 1 else None, auto_start = False)
+    state.fallback_active = False
+    state.frame_count = 0
+    state.dropped_count = 0
+    # only the socket created here is closed by "stop"
+    state.recv_into = None
+    if (state.sock is not None):
+        udp_frame_bind_socket(state)
+        state.port = None
+    udp_frame_reset(led_driver, state)
+    return state
+
+def udp_frame_bind_socket(state):
+    # "recv_into" is not available on every port, "readinto" work the same for UDP sockets
+    state.recv_into = getattr(state.sock, "recv_into", None)
+    if (state.recv_into is None):
+        state.recv_into = state.sock.readinto
+
+def udp_frame_reset(led_driver, state):
+    if (state.sock is None):
+        state.sock = create_udp_socket(state.port)
+        udp_frame_bind_socket(state)
+    state.last_frame_ms = ticks_ms()
+    # show the fallback animation until the first frame
+    udp_frame_start_fallback(led_driver, state)
+    return state
+
+def udp_frame_stop(led_driver, state):
+    udp_frame_stop_fallback(state)
+    if (state.port is not None) and (state.sock is not None):
+        state.sock.close()
+        state.sock = None
+
+def udp_frame_start_fallback(led_driver, state):
+    if (not state.fallback_active):
+        state.fallback_animation.set_led_driver(led_driver)
+        state.fallback_animation.start()
+        state.fallback_active = True
+        # the sender may have restarted, accept any sequence number
+        state.last_sequence = 0
+
+def udp_frame_stop_fallback(state):
+    if (state.fallback_active):
+        state.fallback_animation.stop()
+        state.fallback_active = False
+
+# read the received packets, return True if a complete frame is received
+def udp_frame_receive(state):
+    recv_into = state.recv_into
+    packet = state.packet
+    pushed = False
+    for i in range(state.max_packets):
+        try:
+            size = recv_into(packet)
+        except OSError:
+            # EAGAIN, no more packet
+            break
+        if (size is None) or (size == 0):
+            break
+        if (size < DDP_HEADER_SIZE):
+            state.dropped_count += 1
+            continue
+        flags, sequence, data_type, destination, offset, length = struct.unpack_from(DDP_HEADER, packet, 0)
+        if ((flags & DDP_VERSION_MASK) != DDP_VERSION) or (DDP_HEADER_SIZE + length > size) or (offset + length > len(state.frame)):
+            state.dropped_count += 1
+            continue
+        sequence &= 0x0F
+        if (sequence != 0) and (state.last_sequence != 0):
+            # duplicated or older than the last packet
+            if ((sequence - state.last_sequence) & 0x0F) >= 8 or (sequence == state.last_sequence):
+                state.dropped_count += 1
+                continue
+        if (sequence != 0):
+            state.last_sequence = sequence
+        state.frame_view[offset:offset + length] = state.packet_view[DDP_HEADER_SIZE:DDP_HEADER_SIZE + length]
+        if (flags & DDP_PUSH):
+            pushed = True
+    return pushed
+
+def udp_frame_next_step(led_driver, state):
+    now = ticks_ms()
+    if (udp_frame_receive(state)):
+        udp_frame_stop_fallback(state)
+        state.last_frame_ms = now
+        state.frame_count += 1
+        state.copier.copy(led_driver, state.frame_view)
+        led_driver.write()
+    elif (state.fallback_active):
+        if (state.fallback_animation.led_driver is not led_driver):
+            # the animation is moved to another driver, e.g. at the end of a transition
+            state.fallback_animation.set_led_driver(led_driver)
+        state.fallback_animation.check_event(now)
+    elif (ticks_diff(now, state.last_frame_ms) >= state.timeout):
+        udp_frame_start_fallback(led_driver, state)
+    return state
+
+add_led_strip_animation("udp_frame", {
+        "setup": udp_frame_setup,
+        "reset": udp_frame_reset,
+        "stop": udp_frame_stop,
+        "next_step": udp_frame_next_step
+    })
+
+# send frames to "udp_frame" animation, e.g. from the show controller or for testing by loopback
+# "frame" is the bytes of all LEDs in the color order of the receiver, split into packets of "max_data" bytes
+class LedUdpFrameSender():
+    def __init__(self, host, port = DDP_PORT, max_data = DDP_MAX_DATA):
+        self.address = socket.getaddrinfo(host, port)[0][-1]
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.max_data = max_data
+        self.sequence = 0
+        self.packet = bytearray(DDP_HEADER_SIZE + max_data)
+
+    def send_frame(self, frame):
+        frame = memoryview(frame)
+        offset = 0
+        while (True):
+            length = min(len(frame) - offset, self.max_data)
+            last = offset + length >= len(frame)
+            # sequence number 1 - 15
+            self.sequence = self.sequence % 15 + 1
+            struct.pack_into(DDP_HEADER, self.packet, 0, DDP_VERSION | (DDP_PUSH if last else 0), self.sequence, 0, 1, offset, length)
+            self.packet[DDP_HEADER_SIZE:DDP_HEADER_SIZE + length] = frame[offset:offset + length]
+            self.sock.sendto(memoryview(self.packet)[:DDP_HEADER_SIZE + length], self.address)
+            offset += length
+            if (last):
+                break
+
+    def close(self):
+        self.sock.close()
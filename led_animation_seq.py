@@ -1,6 +1,36 @@
 from machine import Pin
-from time import ticks_ms, ticks_diff
+from time import ticks_ms, ticks_us, ticks_diff, ticks_add
 import math
+import struct
+try:
+    import heapq
+except ImportError:
+    import uheapq as heapq
+# optional accelerated byte loops (viper on MicroPython, NumPy on CPython), see "use_kernels"
+try:
+    import led_animation_kernels
+except Exception:
+    # e.g. SyntaxError if the firmware has no viper code emitter, or ViperTypeError if it cannot compile a kernel
+    led_animation_kernels = None
+
+# asyncio is optional, only needed by "LedStripAnimationSeq.run"
+def import_asyncio():
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+    return asyncio
+
+# wait for the asyncio event at most "timeout_ms", return False if timeout
+async def wait_asyncio_event(asyncio, event, timeout_ms):
+    try:
+        if (hasattr(asyncio, "wait_for_ms")):
+            await asyncio.wait_for_ms(event.wait(), timeout_ms)
+        else:
+            await asyncio.wait_for(event.wait(), timeout_ms / 1000)
+        return True
+    except asyncio.TimeoutError:
+        return False
 
 # The preset animation are defined at the bottom of this files
 led_animation_mapping_callbacks = {}
@@ -17,9 +47,24 @@ def add_led_strip_animation(animation_name, callbacks, confirm_overwrite = False
     led_animation_mapping_callbacks[animation_name] = callbacks
     return True
 
+# bind the customized callback with the LED driver and original callback,
+# so that calling the result only need the remaining arguments
+def bind_led_driver_callback(callback, led_driver, orig_callback, arg_count):
+    if (arg_count == 0):
+        return lambda: callback(led_driver, orig_callback)
+    elif (arg_count == 1):
+        return lambda a: callback(led_driver, orig_callback, a)
+    return lambda a, b: callback(led_driver, orig_callback, a, b)
+
 # wrap custom LED driver to NeoPixel like methods
 # will assume the same way to call NeoPixel for missing callbacks
 class LedDriverWrapper():
+    __slots__ = ("callbacks", "led_driver", "led_count", "bpp", "order", "native_buffer",
+                 "dirty", "write_count", "skipped_write_count", "write_us", "spare_buffer",
+                 "output_buffer", "output_luts", "output_order",
+                 "len_callback", "set_item_callback", "get_item_callback", "fill_callback", "write_callback",
+                 "set_range_callback", "blit_callback", "buffer_callback")
+
     def __init__(self, led_class, pin_number, led_count, callbacks = {}):
         self.callbacks = callbacks
         if (led_class is None):
@@ -27,50 +72,261 @@ class LedDriverWrapper():
             from neopixel import NeoPixel
             led_class = NeoPixel
         if callbacks.get("create", None) is not None:
-            self.callbacks = callbacks
             self.led_driver = callbacks["create"](led_class, self.orig_create_callback, pin_number, led_count)
         else:
             self.led_driver = self.orig_create_callback(led_class, pin_number, led_count)
 
+        # resolve the callbacks once, so that each call does not need to look up the dictionary
+        self.len_callback = self.bind_callback("len", self.orig_len_callback, 0)
+        self.set_item_callback = self.bind_callback("set_item", self.orig_setitem_callback, 2)
+        self.get_item_callback = self.bind_callback("get_item", self.orig_getitem_callback, 1)
+        self.fill_callback = self.bind_callback("fill", self.orig_fill_callback, 1)
+        self.write_callback = self.bind_callback("write", self.orig_write_callback, 0)
+        self.set_range_callback = self.bind_callback("set_range", self.orig_set_range_callback, 2)
+        self.blit_callback = self.bind_callback("blit", self.orig_blit_callback, 2)
+        self.buffer_callback = self.bind_callback("buffer", self.orig_buffer_callback, 0)
+
+        # LED count and buffer layout do not change after created
+        self.led_count = self.len_callback()
+        self.bpp = getattr(self.led_driver, "bpp", 3)
+        self.order = getattr(self.led_driver, "ORDER", (0, 1, 2, 3))
+        self.native_buffer = self.find_native_buffer()
+
+        # track if the buffer changed since last write, so that the same frame is not sent again
+        self.dirty = True
+        self.write_count = 0
+        self.skipped_write_count = 0
+        # total time used by write in microseconds, None to disable the measurement
+        self.write_us = None
+        # the other buffer for double buffer, None if double buffer is not used
+        self.spare_buffer = None
+        # output stage (brightness, gamma and color order), None if not used
+        self.output_buffer = None
+        self.output_luts = None
+        self.output_order = None
+
+    def bind_callback(self, name, orig_callback, arg_count):
+        callback = self.callbacks.get(name, None)
+        if (callback is None):
+            return orig_callback
+        return bind_led_driver_callback(callback, self.led_driver, orig_callback, arg_count)
+
     def __len__(self):
-        if (self.callbacks.get("len", None) is not None):
-            return self.callbacks["len"](self.led_driver, self.orig_len_callback)
-        else:
-            return self.orig_len_callback()
+        return self.led_count
 
     def __setitem__(self, i, v):
-        if (self.callbacks.get("set_item", None) is not None):
-            self.callbacks["set_item"](self.led_driver, self.orig_setitem_callback, i, v)
-        else:
-            self.orig_setitem_callback(i, v)
+        self.dirty = True
+        self.set_item_callback(i, v)
 
     def __getitem__(self, i):
-        if (self.callbacks.get("get_item", None) is not None):
-            return self.callbacks["get_item"](self.led_driver, self.orig_getitem_callback, i)
-        else:
-            return self.orig_getitem_callback(i)
+        return self.get_item_callback(i)
 
     def fill(self, v):
-        if (self.callbacks.get("fill", None) is not None):
-            self.callbacks["fill"](self.led_driver, self.orig_fill_callback, v)
+        self.dirty = True
+        self.fill_callback(v)
+
+    # write the buffer to LEDs, skipped if the buffer is not changed since last write
+    # use "force = True" to always write
+    def write(self, force = False):
+        if (not self.dirty) and (not force):
+            self.skipped_write_count += 1
+            return
+        self.dirty = False
+        self.write_count += 1
+        if (self.write_us is not None):
+            start_us = ticks_us()
+        if (self.output_buffer is not None):
+            self.write_output_stage()
         else:
-            self.orig_fill_callback(v)
+            self.write_callback()
+            if (self.spare_buffer is not None):
+                self.swap_buffers()
+        if (self.write_us is not None):
+            self.write_us += ticks_diff(ticks_us(), start_us)
 
-    def write(self):
-        if (self.callbacks.get("write", None) is not None):
-            self.callbacks["write"](self.led_driver, self.orig_write_callback)
+    # function to mark the buffer changed, if it is modified without using this wrapper
+    def mark_dirty(self):
+        self.dirty = True
+
+    # double buffer: render to the back buffer while the front buffer (last written frame) may still be sending,
+    # e.g. DMA or RMT driven output, so a frame is never changed while it is sending
+    # need the driver to have a "buf" bytearray, return False if not supported
+    def set_double_buffer(self, enable = True):
+        if (not enable):
+            self.spare_buffer = None
+            return True
+        if (self.spare_buffer is not None):
+            return True
+        buf = getattr(self.led_driver, "buf", None)
+        if (not isinstance(buf, bytearray)):
+            return False
+        self.spare_buffer = bytearray(buf)
+        return True
+
+    # the written frame become the front buffer, continue to render on the other buffer
+    def swap_buffers(self):
+        frame = self.led_driver.buf
+        back = self.spare_buffer
+        # keep the latest frame in the back buffer, so animations can continue from it
+        back[:] = frame
+        self.spare_buffer = frame
+        self.led_driver.buf = back
+        if (self.native_buffer is not None):
+            self.native_buffer = back
+
+    # output stage: the animations draw linear colors, "write" send them with global brightness (0 - 255),
+    # gamma correction (number, or tuple of R, G, B, W) and "color_order" of the LEDs (e.g. "RGB", "GRBW") if different from the driver
+    # applied to the whole buffer with one lookup table per channel, the buffer itself is not changed
+    # need the driver to have a "buf" bytearray, return False if not supported
+    # call without arguments to disable
+    def set_output_stage(self, brightness = 255, gamma = None, color_order = None):
+        bpp = self.bpp
+        if (brightness == 255) and (gamma is None) and (color_order is None):
+            self.output_buffer = None
+            self.output_luts = None
+            self.output_order = None
+            return True
+        buf = getattr(self.led_driver, "buf", None)
+        if (not isinstance(buf, bytearray)):
+            return False
+        if (color_order is not None):
+            if (len(color_order) != bpp):
+                raise ValueError("color_order %r does not match %d bytes per LED" % (color_order, bpp))
+            self.output_order = tuple(color_order.index("RGBW"[c]) for c in range(bpp))
         else:
-            self.orig_write_callback()
-            
-    
+            self.output_order = self.order
+        if (gamma is None) or (not isinstance(gamma, (list, tuple))):
+            gamma = (gamma, ) * bpp
+        self.output_luts = tuple(output_lut(brightness, gamma[c] if c < len(gamma) else None) for c in range(bpp))
+        if (self.output_buffer is None) or (len(self.output_buffer) != len(buf)):
+            self.output_buffer = bytearray(len(buf))
+        self.dirty = True
+        return True
+
+    # send the buffer through the output stage, the driver "buf" is replaced by the output buffer only while writing
+    def write_output_stage(self):
+        led_driver = self.led_driver
+        buf = led_driver.buf
+        output_buffer = self.output_buffer
+        bpp = self.bpp
+        order = self.order
+        output_order = self.output_order
+        luts = self.output_luts
+        for c in range(bpp):
+            apply_channel_lut(output_buffer, output_order[c], buf, order[c], bpp, luts[c])
+        led_driver.buf = output_buffer
+        try:
+            self.write_callback()
+        finally:
+            led_driver.buf = buf
+        if (self.spare_buffer is not None):
+            # double buffer, prepare the next frame in the other output buffer while this one may still be sending
+            self.output_buffer = self.spare_buffer
+            self.spare_buffer = output_buffer
+
+    # bulk operations, fallback to set LED one by one if the driver has no native buffer
+    # set LEDs from "start" with the values (sequence of tuples) one by one
+    def set_range(self, start, values):
+        self.dirty = True
+        self.set_range_callback(start, values)
+
+    # copy raw bytes (in driver byte order) to the LED buffer, starting from LED "start"
+    def blit(self, data, start = 0):
+        self.dirty = True
+        self.blit_callback(data, start)
+
+    # get a writable memoryview of the native LED buffer (in driver byte order)
+    # return None if the driver does not have one
+    # the buffer is assumed to be changed once requested
+    def buffer(self):
+        self.dirty = True
+        return self.buffer_callback()
+
+    # function to pack the color tuple to bytes in the same byte order as "blit" data
+    def pack_color(self, v):
+        bpp = self.bpp
+        order = self.order if self.native_buffer is not None else (0, 1, 2, 3)
+        packed = bytearray(bpp)
+        for c in range(min(bpp, len(v))):
+            packed[order[c]] = v[c]
+        return bytes(packed)
+
+    # function to unpack the bytes from "pack_color" back to the color tuple
+    def unpack_color(self, packed):
+        order = self.order if self.native_buffer is not None else (0, 1, 2, 3)
+        return tuple(packed[order[c]] for c in range(self.bpp))
+
+    # fill all LEDs by repeating the packed pattern (e.g. from "pack_color"), which can be several LEDs long
+    # with native buffer the pattern is copied once and then doubled by slice copies
+    # a pattern of one LED go through "fill" if the driver has no native buffer or "fill" is customized by callback
+    def fill_pattern(self, pattern):
+        size = len(pattern)
+        if (size == self.bpp) and ((self.native_buffer is None) or (self.callbacks.get("fill", None) is not None)):
+            self.fill(self.unpack_color(pattern))
+            return
+        self.dirty = True
+        buf = self.buffer_callback()
+        if (buf is not None):
+            self.copy_pattern(buf, pattern)
+        else:
+            bpp = self.bpp
+            pattern_count = size // bpp
+            for start in range(0, self.led_count, pattern_count):
+                count = min(pattern_count, self.led_count - start)
+                self.blit_callback(pattern if count == pattern_count else memoryview(pattern)[:count * bpp], start)
+
+    # copy the pattern repeatedly to the whole buffer
+    def copy_pattern(self, buf, pattern):
+        size = len(pattern)
+        total = len(buf)
+        if (size >= total):
+            buf[:] = memoryview(pattern)[:total]
+            return
+        buf[:size] = pattern
+        while (size < total):
+            count = min(size, total - size)
+            buf[size:size + count] = buf[:count]
+            size += count
+
+    # function to find the native LED buffer (bytearray in driver byte order, e.g. NeoPixel "buf")
+    # return None if the driver has no such buffer or the pixel access is customized by callbacks
+    def find_native_buffer(self):
+        if ((self.callbacks.get("set_item", None) is not None) or
+            (self.callbacks.get("get_item", None) is not None)):
+            return None
+        buf = getattr(self.led_driver, "buf", None)
+        if (not isinstance(buf, bytearray)) or (len(buf) != self.led_count * self.bpp):
+            return None
+        return buf
+
+    # function to take a copy of the current LED buffer as frame buffer (in driver byte order)
+    def get_frame(self):
+        buf = self.buffer_callback()
+        if (buf is not None):
+            return bytearray(buf)
+        bpp = self.bpp
+        frame = bytearray(self.led_count * bpp)
+        for i in range(self.led_count):
+            frame[i * bpp:(i + 1) * bpp] = bytes(self[i])
+        return frame
+
+    # function to copy the frame buffer (from "get_frame") to the LED buffer, rotated by "offset" LEDs
+    # i.e. LED i will get the value of LED (i + offset) in the frame buffer
+    def set_frame(self, frame, offset = 0):
+        bpp = self.bpp
+        offset = self.remap_led_index(offset)
+        frame = memoryview(frame)
+        # bulk copy with two slices
+        self.blit(frame[offset * bpp:], 0)
+        if (offset > 0):
+            self.blit(frame[:offset * bpp], self.led_count - offset)
+
     # function to remap the correct index for rotating LED strip
     def remap_led_index(self, index):
-        while (index < 0):
-            index += len(self.led_driver)
-        while (index >= len(self.led_driver)):
-            index -= len(self.led_driver)
-        return index
-    
+        if (0 <= index < self.led_count):
+            return index
+        return index % self.led_count
+
     # original callback for LED driver
     def orig_create_callback(self, led_class, pin_number, led_count):
         led_strip_pin = Pin(pin_number, Pin.OUT)
@@ -86,25 +342,628 @@ class LedDriverWrapper():
         return self.led_driver[i]
 
     def orig_fill_callback(self, v):
-        self.led_driver.fill(v)
+        buf = self.buffer_callback() if self.native_buffer is not None else None
+        if (buf is not None):
+            # slice copies instead of setting the buffer byte by byte
+            self.copy_pattern(buf, self.pack_color(v))
+        else:
+            self.led_driver.fill(v)
 
     def orig_write_callback(self):
         self.led_driver.write()
 
+    def orig_set_range_callback(self, start, values):
+        buf = self.native_buffer
+        if (buf is not None):
+            bpp = self.bpp
+            order = self.order
+            pos = start * bpp
+            for v in values:
+                for c in range(bpp):
+                    buf[pos + order[c]] = v[c]
+                pos += bpp
+        else:
+            set_item = self.set_item_callback
+            for v in values:
+                set_item(start, v)
+                start += 1
+
+    def orig_blit_callback(self, data, start):
+        buf = self.native_buffer
+        bpp = self.bpp
+        if (buf is not None):
+            buf[start * bpp:start * bpp + len(data)] = data
+        else:
+            # without native buffer, data is in the same order as the LED value tuple
+            set_item = self.set_item_callback
+            for j in range(0, len(data), bpp):
+                set_item(start, tuple(data[j:j + bpp]))
+                start += 1
+
+    def orig_buffer_callback(self):
+        buf = self.native_buffer
+        return memoryview(buf) if buf is not None else None
+
+# view of LEDs "offset" to "offset + length - 1" of a LedDriverWrapper, can be used as the LED driver of LedStripAnimationSeq
+# "reverse" to count the LEDs from the end of the range
+# "write" only mark the range changed, the whole strip is sent once by "LedStripSegments.write"
+class LedDriverSegment(LedDriverWrapper):
+    __slots__ = ("parent", "offset", "reverse")
+
+    def __init__(self, parent, offset, length, reverse = False):
+        self.parent = parent
+        self.offset = offset
+        self.reverse = reverse
+        self.callbacks = {}
+        self.led_driver = parent.led_driver
+        self.led_count = length
+        self.bpp = parent.bpp
+        self.order = parent.order
+        self.native_buffer = None
+        self.update_native_buffer()
+
+        self.len_callback = self.segment_len_callback
+        self.set_item_callback = self.segment_setitem_callback
+        self.get_item_callback = self.segment_getitem_callback
+        self.fill_callback = self.segment_fill_callback
+        self.write_callback = self.segment_write_callback
+        # the bulk operations work on the part of the native buffer, or set LEDs one by one
+        self.set_range_callback = self.orig_set_range_callback
+        self.blit_callback = self.orig_blit_callback
+        self.buffer_callback = self.orig_buffer_callback
+
+        self.dirty = True
+        self.write_count = 0
+        self.skipped_write_count = 0
+        self.write_us = None
+        self.spare_buffer = None
+        self.output_buffer = None
+        self.output_luts = None
+        self.output_order = None
+
+    # function to take the part of the parent native buffer, need to call again if the parent buffer changed (e.g. double buffer)
+    # reversed segment has no native buffer since the LED order is different
+    def update_native_buffer(self):
+        buf = self.parent.native_buffer
+        if (buf is None) or (self.reverse):
+            self.native_buffer = None
+            return
+        bpp = self.bpp
+        self.native_buffer = memoryview(buf)[self.offset * bpp:(self.offset + self.led_count) * bpp]
+
+    # double buffer and output stage are handled by the parent
+    def set_double_buffer(self, enable = True):
+        return not enable
+
+    def set_output_stage(self, brightness = 255, gamma = None, color_order = None):
+        return False
+
+    # function to get the index of the parent from the index of this segment
+    def parent_led_index(self, i):
+        if (self.reverse):
+            return self.offset + self.led_count - 1 - i
+        return self.offset + i
+
+    def segment_len_callback(self):
+        return self.led_count
+
+    def segment_setitem_callback(self, i, v):
+        self.parent.set_item_callback(self.parent_led_index(i), v)
+
+    def segment_getitem_callback(self, i):
+        return self.parent.get_item_callback(self.parent_led_index(i))
+
+    def segment_fill_callback(self, v):
+        if (self.native_buffer is not None):
+            self.copy_pattern(self.buffer_callback(), self.pack_color(v))
+        else:
+            set_item = self.parent.set_item_callback
+            for i in range(self.offset, self.offset + self.led_count):
+                set_item(i, v)
+
+    def segment_write_callback(self):
+        self.parent.dirty = True
+
+# split one LED strip into segments, each segment can run its own animation sequence
+# call "write" after checking the events of all segments, so that the strip is sent once for all segments
+class LedStripSegments():
+    def __init__(self, led_driver):
+        self.led_driver = led_driver
+        self.segments = []
+
+    # return the LedDriverSegment of LEDs "offset" to "offset + length - 1"
+    def add_segment(self, offset, length, reverse = False):
+        if (offset < 0) or (length <= 0) or (offset + length > len(self.led_driver)):
+            raise ValueError("segment %d-%d is out of the LED strip" % (offset, offset + length - 1))
+        segment = LedDriverSegment(self.led_driver, offset, length, reverse)
+        self.segments.append(segment)
+        return segment
+
+    # write the strip if any segment changed
+    def write(self, force = False):
+        led_driver = self.led_driver
+        native_buffer = led_driver.native_buffer
+        led_driver.write(force)
+        if (led_driver.native_buffer is not native_buffer):
+            # buffer swapped by double buffer
+            for segment in self.segments:
+                segment.update_native_buffer()
+
+# in-memory LED driver with the same interface as NeoPixel, e.g. the layers of LedLayerCompositor
+# "changed" is set by "write" until cleared by the user of the buffer
+class LedFrameBuffer():
+    def __init__(self, n, bpp = 3, order = (1, 0, 2, 3)):
+        self.n = n
+        self.bpp = bpp
+        self.ORDER = order
+        self.buf = bytearray(n * bpp)
+        self.changed = True
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, i, v):
+        offset = i * self.bpp
+        for c in range(self.bpp):
+            self.buf[offset + self.ORDER[c]] = v[c]
+
+    def __getitem__(self, i):
+        offset = i * self.bpp
+        return tuple(self.buf[offset + self.ORDER[c]] for c in range(self.bpp))
+
+    def fill(self, v):
+        b = self.buf
+        l = len(self.buf)
+        bpp = self.bpp
+        for c in range(bpp):
+            value = v[c]
+            j = self.ORDER[c]
+            while j < l:
+                b[j] = value
+                j += bpp
+
+    def write(self):
+        self.changed = True
+
+# byte level blending of LED buffers, "lut" maps the source byte (e.g. scaled by brightness)
+# dst = lut[src]
+def blend_copy(dst, src, lut):
+    for i in range(len(dst)):
+        dst[i] = lut[src[i]]
+
+# dst = min(dst + lut[src], 255)
+def blend_add(dst, src, lut):
+    for i in range(len(dst)):
+        v = dst[i] + lut[src[i]]
+        dst[i] = v if v < 255 else 255
+
+# dst = max(dst, lut[src])
+def blend_max(dst, src, lut):
+    for i in range(len(dst)):
+        v = lut[src[i]]
+        if (v > dst[i]):
+            dst[i] = v
+
+# dst = lut[src] + dst_lut[dst], the tables are scaled by alpha and "255 - alpha" so the sum never exceed 255
+def blend_alpha(dst, src, lut, dst_lut):
+    for i in range(len(dst)):
+        dst[i] = lut[src[i]] + dst_lut[dst[i]]
+
+# lookup table of the output stage, scale by "brightness / 255" and then gamma correction
+def output_lut(brightness, gamma = None):
+    if (gamma is None) or (gamma == 1):
+        return scale_lut(brightness)
+    return bytes(int(255 * math.pow(v * brightness / (255 * 255), gamma) + 0.5) for v in range(256))
+
+# dst[dst_offset + k * step] = lut[src[src_offset + k * step]], i.e. map one channel of the LED buffer
+def apply_channel_lut(dst, dst_offset, src, src_offset, step, lut):
+    l = len(src)
+    while src_offset < l:
+        dst[dst_offset] = lut[src[src_offset]]
+        src_offset += step
+        dst_offset += step
+
+# lookup table to scale a byte by "numerator / denominator"
+def scale_lut(numerator, denominator = 255):
+    return bytes(v * numerator // denominator for v in range(256))
+
+# same as "scale_lut" but update the table (bytearray) in place
+def update_scale_lut(lut, numerator, denominator = 255):
+    for v in range(256):
+        lut[v] = v * numerator // denominator
+
+# the pure Python byte loops, used if the accelerated kernels are not available
+python_kernels = {
+    "blend_copy": blend_copy,
+    "blend_add": blend_add,
+    "blend_max": blend_max,
+    "blend_alpha": blend_alpha,
+    "apply_channel_lut": apply_channel_lut,
+}
+
+# switch the byte loops to the accelerated kernels from "led_animation_kernels", return False if not available
+# "enable = False" to use the pure Python loops
+def use_kernels(enable = True):
+    kernels = python_kernels
+    available = (led_animation_kernels is not None) and led_animation_kernels.kernels_available
+    if (enable) and (available):
+        kernels = {name: getattr(led_animation_kernels, name) for name in python_kernels}
+    globals().update(kernels)
+    return available or not enable
+
+use_kernels()
+
+# one layer of LedLayerCompositor, "led_driver" is the LedDriverWrapper to draw the layer (e.g. as LedStripAnimationSeq "led_driver")
+class LedLayer():
+    __slots__ = ("frame_buffer", "led_driver", "blend", "brightness", "alpha", "lut", "dst_lut")
+
+    def __init__(self, frame_buffer, led_driver, blend = "alpha", brightness = 255, alpha = 255):
+        if (blend not in ("alpha", "add", "max")):
+            raise ValueError("unknown blend mode %r" % (blend, ))
+        self.frame_buffer = frame_buffer
+        self.led_driver = led_driver
+        self.blend = blend
+        self.brightness = brightness
+        self.alpha = alpha
+        self.lut = None
+        self.dst_lut = None
+        self.update_lut()
+
+    # brightness and alpha are 0 - 255
+    def set_brightness(self, brightness):
+        self.brightness = brightness
+        self.update_lut()
+        self.frame_buffer.changed = True
+
+    def set_alpha(self, alpha):
+        self.alpha = alpha
+        self.update_lut()
+        self.frame_buffer.changed = True
+
+    def update_lut(self):
+        if (self.blend == "alpha"):
+            self.lut = scale_lut(self.brightness * self.alpha, 255 * 255)
+            self.dst_lut = scale_lut(255 - self.alpha)
+        else:
+            self.lut = scale_lut(self.brightness)
+            self.dst_lut = None
+
+# stack the animations of several layers on one strip
+# each layer draw to its own frame buffer, "write" blend the layers from the bottom (first added) and send the strip once
+# blend modes: "alpha" (mix with the layers below by "alpha"), "add" (sum, clipped at 255), "max" (the brighter one)
+class LedLayerCompositor():
+    def __init__(self, led_driver, brightness = 255):
+        self.led_driver = led_driver
+        self.led_count = len(led_driver)
+        self.layers = []
+        # frame to blend when the driver has no native buffer
+        self.frame = None
+        self.brightness = brightness
+        self.brightness_lut = scale_lut(brightness)
+        # blend again even if no layer changed, e.g. removed layer
+        self.changed = True
+
+    # return the LedLayer, draw the layer with its "led_driver"
+    def add_layer(self, blend = "alpha", brightness = 255, alpha = 255):
+        # same byte order as "blit" data, so the blended frame can be copied to the strip
+        order = self.led_driver.order if self.led_driver.native_buffer is not None else (0, 1, 2, 3)
+        frame_buffer = LedFrameBuffer(self.led_count, self.led_driver.bpp, order)
+        layer_driver = LedDriverWrapper(LedFrameBuffer, None, self.led_count,
+                                        {"create": lambda led_class, orig_callback, pin_number, led_count: frame_buffer})
+        layer = LedLayer(frame_buffer, layer_driver, blend, brightness, alpha)
+        self.layers.append(layer)
+        return layer
+
+    def remove_layer(self, layer):
+        if (layer in self.layers):
+            self.layers.remove(layer)
+            self.changed = True
+
+    # global brightness 0 - 255
+    def set_brightness(self, brightness):
+        self.brightness = brightness
+        self.brightness_lut = scale_lut(brightness)
+        self.changed = True
+
+    # blend the layers and write the strip, skipped if no layer changed
+    def write(self, force = False):
+        changed = force or self.changed
+        self.changed = False
+        for layer in self.layers:
+            if (layer.frame_buffer.changed):
+                layer.frame_buffer.changed = False
+                changed = True
+        if (changed):
+            self.compose()
+        self.led_driver.write(force)
+
+    def compose(self):
+        dst = self.led_driver.buffer()
+        if (dst is None):
+            if (self.frame is None):
+                self.frame = bytearray(self.led_count * self.led_driver.bpp)
+            dst = self.frame
+        if (len(self.layers) == 0):
+            for i in range(len(dst)):
+                dst[i] = 0
+        for i, layer in enumerate(self.layers):
+            src = layer.frame_buffer.buf
+            if (i == 0):
+                # nothing below the bottom layer
+                blend_copy(dst, src, layer.lut)
+            elif (layer.blend == "add"):
+                blend_add(dst, src, layer.lut)
+            elif (layer.blend == "max"):
+                blend_max(dst, src, layer.lut)
+            else:
+                blend_alpha(dst, src, layer.lut, layer.dst_lut)
+        if (self.brightness != 255):
+            blend_copy(dst, dst, self.brightness_lut)
+        if (dst is self.frame):
+            self.led_driver.blit(dst, 0)
+        else:
+            self.led_driver.mark_dirty()
+
+# check the "transition" attribute of an animation step, raise ValueError if malformed
+#   {"type": "crossfade" or "wipe", "duration": ms, "speed": ms between frames (default 20), "direction": "up" or "down" (wipe only)}
+def check_transition(transition):
+    if (not isinstance(transition, dict)):
+        raise ValueError("transition must be dict")
+    if (transition.get("type", None) not in ("crossfade", "wipe")):
+        raise ValueError("transition type must be \"crossfade\" or \"wipe\"")
+    duration = transition.get("duration", None)
+    if (not isinstance(duration, int)) or (duration <= 0):
+        raise ValueError("transition duration must be int > 0")
+    speed = transition.get("speed", 20)
+    if (not isinstance(speed, int)) or (speed <= 0):
+        raise ValueError("transition speed must be int > 0")
+    if (transition.get("direction", "up") not in ("up", "down")):
+        raise ValueError("transition direction must be \"up\" or \"down\"")
+
+# transition between two animations of LedStripAnimationSeq
+# both animations draw to their own frame buffer, and the mixed frame is copied to the LED driver
+class LedTransition():
+    def __init__(self, led_driver):
+        self.led_driver = led_driver
+        led_count = len(led_driver)
+        # same byte order as "blit" data, so the frame buffers can be copied to the LED driver
+        order = led_driver.order if led_driver.native_buffer is not None else (0, 1, 2, 3)
+        self.outgoing_driver = LedDriverWrapper(LedFrameBuffer, None, led_count,
+                                                {"create": lambda led_class, orig_callback, pin_number, led_count: LedFrameBuffer(led_count, led_driver.bpp, order)})
+        self.incoming_driver = LedDriverWrapper(LedFrameBuffer, None, led_count,
+                                                {"create": lambda led_class, orig_callback, pin_number, led_count: LedFrameBuffer(led_count, led_driver.bpp, order)})
+        # views of the frame buffers, so that slicing them for "wipe" does not copy
+        self.outgoing_buf = memoryview(self.outgoing_driver.led_driver.buf)
+        self.incoming_buf = memoryview(self.incoming_driver.led_driver.buf)
+        # frame to mix when the driver has no native buffer
+        self.frame = None
+        # crossfade tables, updated in place when the level change
+        self.lut = bytearray(256)
+        self.dst_lut = bytearray(256)
+        self.level = -1
+        self.active = False
+        self.outgoing = None
+        self.incoming = None
+        self.transition_type = None
+        self.duration = 0
+        self.speed = 20
+        self.reverse = False
+        self.start_time_ms = None
+        self.next_action_time_ms = None
+
+    # move the outgoing animation to its frame buffer (with the current LEDs), must be called before starting the incoming animation
+    def prepare(self, outgoing):
+        buf = self.outgoing_buf
+        src = self.led_driver.buffer_callback()
+        if (src is not None):
+            buf[:] = src
+        else:
+            buf[:] = self.led_driver.get_frame()
+        self.outgoing_driver.mark_dirty()
+        outgoing.set_led_driver(self.outgoing_driver)
+        self.outgoing = outgoing
+
+    # start the transition to the incoming animation, which draw to "incoming_driver"
+    def start(self, transition, incoming, start_time_ms):
+        self.transition_type = transition["type"]
+        self.duration = transition["duration"]
+        self.speed = transition.get("speed", 20)
+        self.reverse = transition.get("direction", "up") == "down"
+        self.incoming = incoming
+        self.level = -1
+        self.active = True
+        self.start_time_ms = start_time_ms
+        self.render(start_time_ms)
+
+    # function to check if the transition frame is due, the incoming animation is checked by the caller
+    def check_event(self, now):
+        self.outgoing.check_event(now)
+        if (ticks_diff(now, self.next_action_time_ms) > 0):
+            self.render(now)
+
+    def render(self, now):
+        elapsed_ms = ticks_diff(now, self.start_time_ms)
+        if (elapsed_ms >= self.duration):
+            self.end()
+            return
+        dst = self.led_driver.buffer()
+        if (dst is None):
+            if (self.frame is None):
+                self.frame = bytearray(len(self.led_driver) * self.led_driver.bpp)
+            dst = self.frame
+        outgoing_buf = self.outgoing_buf
+        incoming_buf = self.incoming_buf
+        if (self.transition_type == "wipe"):
+            # LEDs from the start (or the end for "down") show the incoming animation
+            size = len(self.led_driver) * elapsed_ms // self.duration * self.led_driver.bpp
+            if (self.reverse):
+                size = len(dst) - size
+                dst[:size] = outgoing_buf[:size]
+                dst[size:] = incoming_buf[size:]
+            else:
+                dst[:size] = incoming_buf[:size]
+                dst[size:] = outgoing_buf[size:]
+        else:
+            level = elapsed_ms * 255 // self.duration
+            if (level != self.level):
+                self.level = level
+                update_scale_lut(self.lut, level)
+                update_scale_lut(self.dst_lut, 255 - level)
+            dst[:] = outgoing_buf
+            blend_alpha(dst, incoming_buf, self.lut, self.dst_lut)
+        if (dst is self.frame):
+            self.led_driver.blit(dst, 0)
+        self.led_driver.write()
+        self.next_action_time_ms = ticks_add(now, self.speed)
+
+    # show the incoming animation, both animations draw to the LED driver again
+    def end(self):
+        if (not self.active):
+            return
+        self.active = False
+        self.led_driver.blit(self.incoming_buf, 0)
+        self.incoming.set_led_driver(self.led_driver)
+        self.outgoing.set_led_driver(self.led_driver)
+        if (self.outgoing is not self.incoming):
+            self.outgoing.stop()
+        self.incoming = None
+        self.outgoing = None
+        self.next_action_time_ms = None
+        self.led_driver.write()
+
+# compact animation state with fixed fields, used by the preset animations instead of dict
+# "next_delay" is the step interval in ms (same as "__next_delay__" of dict state), None to use the "speed" attribute
+class LedAnimationState():
+    __slots__ = ("next_delay",)
+
+    def __init__(self, next_delay = None):
+        self.next_delay = next_delay
+
+# timing statistics of one animation
+# compute and write time are in microseconds, lateness is in milliseconds
+class LedAnimationStats():
+    __slots__ = ("animation_type", "setup_us", "tick_count",
+                 "compute_us_min", "compute_us_max", "compute_us_total",
+                 "write_us_min", "write_us_max", "write_us_total",
+                 "late_tick_count", "lateness_ms_max", "lateness_ms_total", "missed_deadline_count",
+                 "skipped_frame_count")
+
+    def __init__(self, animation_type):
+        self.animation_type = animation_type
+        self.setup_us = 0
+        self.tick_count = 0
+        self.compute_us_min = None
+        self.compute_us_max = 0
+        self.compute_us_total = 0
+        self.write_us_min = None
+        self.write_us_max = 0
+        self.write_us_total = 0
+        self.late_tick_count = 0
+        self.lateness_ms_max = 0
+        self.lateness_ms_total = 0
+        self.missed_deadline_count = 0
+        self.skipped_frame_count = 0
+
+    # add the result of one tick, "lateness_ms" is None if the tick is not triggered by time
+    # a deadline is missed when the tick is late for a whole delay, i.e. the next tick is also due
+    def add_tick(self, compute_us, write_us, lateness_ms = None, next_delay = None):
+        self.tick_count += 1
+        self.compute_us_total += compute_us
+        self.compute_us_max = max(self.compute_us_max, compute_us)
+        self.compute_us_min = compute_us if self.compute_us_min is None else min(self.compute_us_min, compute_us)
+        self.write_us_total += write_us
+        self.write_us_max = max(self.write_us_max, write_us)
+        self.write_us_min = write_us if self.write_us_min is None else min(self.write_us_min, write_us)
+        if (lateness_ms is not None):
+            self.late_tick_count += 1
+            self.lateness_ms_total += lateness_ms
+            self.lateness_ms_max = max(self.lateness_ms_max, lateness_ms)
+            if (next_delay is not None) and (next_delay > 0) and (lateness_ms >= next_delay):
+                self.missed_deadline_count += 1
+
+    def compute_us_avg(self):
+        return self.compute_us_total // self.tick_count if self.tick_count > 0 else 0
+
+    def write_us_avg(self):
+        return self.write_us_total // self.tick_count if self.tick_count > 0 else 0
+
+    def lateness_ms_avg(self):
+        return self.lateness_ms_total // self.late_tick_count if self.late_tick_count > 0 else 0
+
+    # function to export the statistics as dictionary
+    def as_dict(self):
+        return {
+            "animation_type": self.animation_type,
+            "setup_us": self.setup_us,
+            "tick_count": self.tick_count,
+            "compute_us_min": self.compute_us_min,
+            "compute_us_avg": self.compute_us_avg(),
+            "compute_us_max": self.compute_us_max,
+            "write_us_min": self.write_us_min,
+            "write_us_avg": self.write_us_avg(),
+            "write_us_max": self.write_us_max,
+            "lateness_ms_avg": self.lateness_ms_avg(),
+            "lateness_ms_max": self.lateness_ms_max,
+            "missed_deadline_count": self.missed_deadline_count,
+            "skipped_frame_count": self.skipped_frame_count,
+            }
+
 # manage animation sequence
+# "fixed_rate": count the next event time from the last scheduled time instead of the time the event run,
+#   so that compute time and loop jitter do not add up
+# "catch_up": for fixed rate, what to do when the animation overrun the next event time
+#   "skip" - drop the missed frames and continue at the next time in phase
+#   "burst" - run the missed frames right away (up to "max_burst_frames" frames, otherwise skip)
 class LedStripAnimationSeq():
-    def __init__(self, pin_number, led_count, animation_seq, led_class = None, led_class_callbacks = {}, manual_trigger_event = False, seq_callbacks = {}):
-        self.led_driver = LedDriverWrapper(led_class, pin_number, led_count, led_class_callbacks)            
+    def __init__(self, pin_number, led_count, animation_seq, led_class = None, led_class_callbacks = {}, manual_trigger_event = False, seq_callbacks = {}, enable_stats = False,
+                 fixed_rate = False, catch_up = "skip", frame_cache = None, led_driver = None):
+        # "led_driver" to use an existing LedDriverWrapper (e.g. LedDriverSegment) instead of creating one
+        if (led_driver is not None):
+            self.led_driver = led_driver
+            led_count = len(led_driver)
+        else:
+            self.led_driver = LedDriverWrapper(led_class, pin_number, led_count, led_class_callbacks)            
         self.led_count = led_count
         self.manual_trigger_event = manual_trigger_event
         self.seq_callbacks = seq_callbacks
+        self.enable_stats = enable_stats
+        self.fixed_rate = fixed_rate
+        self.catch_up = catch_up
+        self.frame_cache = frame_cache
+        if (enable_stats):
+            self.led_driver.write_us = 0
         self.animation = None
         self.next_action_time_ms = None
+        # transition between animations, created when the first step with "transition" attribute start
+        self.transition = None
+        # events posted to the asyncio runner
+        self.posted_events = []
+        self.posted_event_flag = None
+        # hardware timer for timer mode
+        self.timer = None
+        self.timer_manual_trigger_event = manual_trigger_event
         self.update_animation_seq(animation_seq)
     
+    # "seq" can be a list or the plan from "compile_animation_seq"
     def update_animation_seq(self, seq):
+        old_seq = getattr(self, "animation_seq", None)
+        if (isinstance(old_seq, LedAnimationSeqFile)) and (old_seq is not seq):
+            # hot swap from a sequence file, the file opened by path is closed
+            old_seq.close()
         self.animation_seq = seq
         self.animation_seq_step = 0
+        self.plan_animations = None
+        if (isinstance(seq, LedAnimationPlan)):
+            # create the animations once, starting a step then reuses the animation and its state
+            self.plan_animations = [LedStripAnimation(self.led_driver,
+                                                      step.animation_type,
+                                                      step.attributes,
+                                                      enable_stats = self.enable_stats,
+                                                      fixed_rate = self.fixed_rate,
+                                                      catch_up = self.catch_up,
+                                                      frame_cache = self.frame_cache,
+                                                      callbacks = step.callbacks,
+                                                      auto_start = False) for step in seq]
         self.start_animation()        
         
     # start next animation
@@ -112,46 +971,239 @@ class LedStripAnimationSeq():
         self.animation_seq_step += 1
         self.start_animation()
 
-    def start_animation(self):
+    # "start_time_ms" is the time the animation should start, default is now
+    def start_animation(self, start_time_ms = None):
+        now = ticks_ms()
+        if (start_time_ms is None) or (ticks_diff(now, start_time_ms) < 0):
+            start_time_ms = now
         self.animation_seq_step = self.remap_animation_step(self.animation_seq_step)
+        self.report_stats()
+        if (self.transition is not None):
+            # the last transition is not finished, show the animation it changed to
+            self.transition.end()
+        outgoing = self.animation
         cur_step = self.animation_seq[self.animation_seq_step]
-        cur_step_len = len(cur_step)
-        animation_name = cur_step[0]
-        animation_duration = cur_step[1]
-        animation_attribute = cur_step[2] if cur_step_len > 2 else None
-        self.animation = LedStripAnimation(self.led_driver,
-                                           animation_name,
-                                           animation_attribute)
-        self.next_action_time_ms = None if animation_duration is None or animation_duration == 0 else ticks_ms() + animation_duration
+        if (self.plan_animations is not None):
+            animation_duration = cur_step.duration
+            animation_attribute = cur_step.attributes
+            incoming = self.plan_animations[self.animation_seq_step]
+        else:
+            cur_step_len = len(cur_step)
+            animation_name = cur_step[0]
+            animation_duration = cur_step[1]
+            animation_attribute = cur_step[2] if cur_step_len > 2 else None
+            incoming = None
+        transition = animation_attribute.get("transition", None) if isinstance(animation_attribute, dict) else None
+        if (transition is not None):
+            check_transition(transition)
+            if (outgoing is None) or (outgoing is incoming) or ((self.manual_trigger_event) and (self.timer is None)):
+                # nothing to change from, or not driven by time
+                transition = None
+        led_driver = self.led_driver
+        if (transition is not None):
+            if (self.transition is None):
+                self.transition = LedTransition(self.led_driver)
+            self.transition.prepare(outgoing)
+            led_driver = self.transition.incoming_driver
+        if (incoming is not None):
+            incoming.set_led_driver(led_driver)
+            incoming.start(start_time_ms)
+        else:
+            incoming = LedStripAnimation(led_driver,
+                                         animation_name,
+                                         animation_attribute,
+                                         enable_stats = self.enable_stats,
+                                         fixed_rate = self.fixed_rate,
+                                         catch_up = self.catch_up,
+                                         start_time_ms = start_time_ms,
+                                         frame_cache = self.frame_cache)
+        self.animation = incoming
+        if (transition is not None):
+            self.transition.start(transition, incoming, start_time_ms)
+        elif (outgoing is not None) and (outgoing is not incoming):
+            outgoing.stop()
+        if (isinstance(self.animation_seq, LedAnimationSeqFile)):
+            # read the next step now, so that changing step does not wait for the file
+            self.animation_seq.preload(self.remap_animation_step(self.animation_seq_step + 1))
+        self.next_action_time_ms = None if animation_duration is None or animation_duration == 0 else ticks_add(start_time_ms, animation_duration)
+        if (self.fixed_rate) and (self.next_action_time_ms is not None) and (ticks_diff(now, self.next_action_time_ms) >= 0):
+            # too late to keep in phase, never skip a whole animation so count from now
+            self.next_action_time_ms = ticks_add(now, animation_duration)
+        if (self.timer is not None):
+            self.arm_timer()
     
     # function to check if any event triggered by time (animation change seq, animation next step)
-    def check_event(self):
+    # "now" is the current ticks_ms(), to share one reading with other strips
+    def check_event(self, now = None):
         if (not self.manual_trigger_event):
+            if (now is None):
+                now = ticks_ms()
             if ((self.next_action_time_ms is not None) and
-                (ticks_diff(ticks_ms(), self.next_action_time_ms) > 0)):
-                # check which callback should run
-                self.animation_seq_step += 1
-                if (self.animation_seq_step >= len(self.animation_seq)):
-                    # run "seq_end" callback since it is already over the list
-                    callback = self.seq_callbacks.get("seq_end", None)
-                    if (callback is not None):
-                        animation_seq_step = callback()
-                        if (animation_seq_step is not None):
-                            self.animation_seq_step = max(min(animation_seq_step, len(self.animation_seq)), 0)
-                else:
-                    # run "change_animation" callback
-                    callback = self.seq_callbacks.get("change_animation", None)
-                    if (callback is not None):
-                        animation_seq_step = callback(self.animation_seq_step)
-                        if (animation_seq_step is not None):
-                            self.animation_seq_step = max(min(animation_seq_step, len(self.animation_seq)), 0)
-                self.start_animation()
+                (ticks_diff(now, self.next_action_time_ms) > 0)):
+                self.change_animation_event()
             else:
-                self.animation.check_event()
+                self.animation.check_event(now)
+                if (self.transition is not None) and (self.transition.active):
+                    self.transition.check_event(now)
+
+    # function to change animation when the duration of current animation is over
+    def change_animation_event(self):
+        # check which callback should run
+        self.animation_seq_step += 1
+        if (self.animation_seq_step >= len(self.animation_seq)):
+            # run "seq_end" callback since it is already over the list
+            callback = self.seq_callbacks.get("seq_end", None)
+            if (callback is not None):
+                animation_seq_step = callback()
+                if (animation_seq_step is not None):
+                    self.animation_seq_step = max(min(animation_seq_step, len(self.animation_seq)), 0)
+        else:
+            # run "change_animation" callback
+            callback = self.seq_callbacks.get("change_animation", None)
+            if (callback is not None):
+                animation_seq_step = callback(self.animation_seq_step)
+                if (animation_seq_step is not None):
+                    self.animation_seq_step = max(min(animation_seq_step, len(self.animation_seq)), 0)
+        # for fixed rate, the next animation start at the scheduled time instead of now
+        self.start_animation(self.next_action_time_ms if self.fixed_rate else None)
+
+    # function to get the time (ticks_ms) of the next event, None if no event is scheduled by time
+    def get_next_event_time(self):
+        if (self.manual_trigger_event):
+            return None
+        return self.get_scheduled_time()
+
+    # function to get the scheduled time (ticks_ms) of the next event, even in manual trigger mode
+    def get_scheduled_time(self):
+        next_time = self.next_action_time_ms
+        animation_time = self.animation.next_action_time_ms if (self.animation is not None) and (self.animation.animation_type is not None) else None
+        if (next_time is None) or ((animation_time is not None) and (ticks_diff(animation_time, next_time) < 0)):
+            next_time = animation_time
+        if (self.transition is not None) and (self.transition.active):
+            # the transition frame and the outgoing animation
+            for transition_time in (self.transition.next_action_time_ms,
+                                    self.transition.outgoing.next_action_time_ms if self.transition.outgoing.animation_type is not None else None):
+                if (next_time is None) or ((transition_time is not None) and (ticks_diff(transition_time, next_time) < 0)):
+                    next_time = transition_time
+        return next_time
     
     # function to trigger animation event (use at manual mode)
     def trigger_animation_event(self):
          self.animation.trigger_event()
+         if (self.timer is not None):
+             self.arm_timer()
+
+    # timer mode: use a hardware timer to run the events at the scheduled time, no need to call "check_event"
+    # the timer interrupt use "micropython.schedule" to run the events outside the interrupt
+    # the sequence is switched to manual trigger mode while the timer is running
+    def start_timer(self, timer_id = -1):
+        from machine import Timer
+        import micropython
+        self.stop_timer()
+        self.timer_manual_trigger_event = self.manual_trigger_event
+        self.manual_trigger_event = True
+        self.timer_schedule = micropython.schedule
+        self.timer_one_shot = Timer.ONE_SHOT
+        # keep the bound methods, so the interrupt does not need to allocate memory
+        self.timer_isr_callback = self.timer_isr
+        self.timer_service_callback = self.timer_service
+        self.timer = Timer(timer_id)
+        self.arm_timer()
+
+    def stop_timer(self):
+        if (self.timer is not None):
+            self.timer.deinit()
+            self.timer = None
+            self.manual_trigger_event = self.timer_manual_trigger_event
+
+    # arm the timer for the next event, the delay of animation step is from "__next_delay__"
+    def arm_timer(self):
+        next_time = self.get_scheduled_time()
+        if (next_time is None):
+            self.timer.deinit()
+            return
+        delay = max(ticks_diff(next_time, ticks_ms()), 1)
+        self.timer.init(mode = self.timer_one_shot, period = delay, callback = self.timer_isr_callback)
+
+    def timer_isr(self, timer):
+        self.timer_schedule(self.timer_service_callback, None)
+
+    # run the due event, then arm the timer again
+    def timer_service(self, arg):
+        if (self.timer is None):
+            return
+        now = ticks_ms()
+        if (self.next_action_time_ms is not None) and (ticks_diff(now, self.next_action_time_ms) >= 0):
+            # "start_animation" arm the timer
+            self.change_animation_event()
+            return
+        self.animation.check_event(now, True)
+        if (self.transition is not None) and (self.transition.active):
+            self.transition.outgoing.check_event(now, True)
+            if (ticks_diff(now, self.transition.next_action_time_ms) >= 0):
+                self.transition.render(now)
+        self.arm_timer()
+
+    # asyncio task to run the sequence, sleep until the next event instead of busy polling:
+    #   asyncio.create_task(led_strip_seq.run())
+    # other tasks change the sequence by "post_event", the task end after "stop" event
+    async def run(self):
+        asyncio = import_asyncio()
+        self.posted_event_flag = asyncio.Event()
+        while (True):
+            while (len(self.posted_events) > 0):
+                if (not self.handle_posted_event(self.posted_events.pop(0))):
+                    self.posted_event_flag = None
+                    return
+            self.check_event()
+            if (len(self.posted_events) > 0):
+                continue
+            next_time = self.get_next_event_time()
+            if (next_time is None):
+                await self.posted_event_flag.wait()
+            else:
+                # events run when the time is over the scheduled time
+                delay = ticks_diff(next_time, ticks_ms()) + 1
+                if (delay > 0):
+                    await wait_asyncio_event(asyncio, self.posted_event_flag, delay)
+                else:
+                    # let other tasks run even if the animation cannot keep up
+                    await asyncio.sleep(0)
+            self.posted_event_flag.clear()
+
+    # post event to the asyncio runner, events:
+    #   "trigger" - trigger animation event (same as "trigger_animation_event")
+    #   "next" - start next animation (same as "next_animation")
+    #   "update" - update animation sequence, e.g. post_event("update", animation_seq)
+    #   "stop" - stop the runner
+    def post_event(self, event, *args):
+        self.posted_events.append((event, args))
+        if (self.posted_event_flag is not None):
+            self.posted_event_flag.set()
+
+    # return False if the runner should stop
+    def handle_posted_event(self, posted_event):
+        event, args = posted_event
+        if (event == "trigger"):
+            self.trigger_animation_event()
+        elif (event == "next"):
+            self.next_animation()
+        elif (event == "update"):
+            self.update_animation_seq(*args)
+        elif (event == "stop"):
+            return False
+        return True
+
+    # function to get the statistics of current animation, None if statistics is not enabled
+    def get_stats(self):
+        return self.animation.stats if self.animation is not None else None
+
+    # run "stats" callback with the statistics of the current animation before it is replaced
+    def report_stats(self):
+        if (self.animation is not None) and (self.animation.stats is not None):
+            callback = self.seq_callbacks.get("stats", None)
+            if (callback is not None):
+                callback(self.animation.stats)
     
     # function to remap the correct animation step for rotating sequence
     def remap_animation_step(self, step):
@@ -162,64 +1214,725 @@ class LedStripAnimationSeq():
         return step            
         
 
+# drive many animation sequences (e.g. one per strip) from one loop
+# keep a min-heap of the next event time of each sequence, so each pass only read the time once
+# and only check the sequences which are due
+class LedStripAnimationController():
+    # rebase the heap keys before the ticks difference get too large
+    REBASE_TIME_MS = 1 << 20
+
+    def __init__(self, led_strip_seqs = ()):
+        self.led_strip_seqs = []
+        self.event_keys = []
+        self.event_heap = []
+        self.base_time_ms = ticks_ms()
+        for led_strip_seq in led_strip_seqs:
+            self.add_led_strip_seq(led_strip_seq)
+
+    def add_led_strip_seq(self, led_strip_seq):
+        self.led_strip_seqs.append(led_strip_seq)
+        self.event_keys.append(None)
+        self.schedule(len(self.led_strip_seqs) - 1)
+
+    def remove_led_strip_seq(self, led_strip_seq):
+        seq_id = self.led_strip_seqs.index(led_strip_seq)
+        # keep the index of other sequences, the heap entries of removed one become stale
+        self.led_strip_seqs[seq_id] = None
+        self.event_keys[seq_id] = None
+
+    # function to update the next event time of a sequence
+    # call it after changing the sequence outside the controller (e.g. "next_animation", "update_animation_seq")
+    def reschedule(self, led_strip_seq):
+        self.schedule(self.led_strip_seqs.index(led_strip_seq))
+
+    def schedule(self, seq_id):
+        led_strip_seq = self.led_strip_seqs[seq_id]
+        next_time = led_strip_seq.get_next_event_time() if led_strip_seq is not None else None
+        if (next_time is None):
+            self.event_keys[seq_id] = None
+            return
+        key = ticks_diff(next_time, self.base_time_ms)
+        self.event_keys[seq_id] = key
+        heapq.heappush(self.event_heap, (key, seq_id))
+
+    def rebase(self, now):
+        self.base_time_ms = now
+        self.event_heap = []
+        for seq_id in range(len(self.led_strip_seqs)):
+            self.schedule(seq_id)
+
+    # function to check the events of all sequences
+    # return the time (ms) until the next event, so the caller can sleep, None if no event is scheduled
+    def check_event(self):
+        now = ticks_ms()
+        if (ticks_diff(now, self.base_time_ms) > self.REBASE_TIME_MS):
+            self.rebase(now)
+        now_key = ticks_diff(now, self.base_time_ms)
+        event_heap = self.event_heap
+        while (len(event_heap) > 0):
+            key, seq_id = event_heap[0]
+            if (self.event_keys[seq_id] != key):
+                # stale entry, the sequence has been rescheduled or removed
+                heapq.heappop(event_heap)
+                continue
+            if (key >= now_key):
+                return key - now_key
+            heapq.heappop(event_heap)
+            self.led_strip_seqs[seq_id].check_event(now)
+            self.schedule(seq_id)
+        return None
+
+
+# cache of pre-rendered frames of periodic animations (animations with "period" callback), can be shared by strips
+# frames of one period are kept in one bytearray (in driver byte order), so playing a frame is one copy
+# the least recently used entries are removed when over "max_bytes"
+class LedFrameCache():
+    def __init__(self, max_bytes = 16384):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.entries = {}
+        # keys from least to most recently used
+        self.lru_keys = []
+        self.hit_count = 0
+        self.miss_count = 0
+
+    # function to get the frames of the key, None if not cached
+    def get(self, key):
+        frames = self.entries.get(key, None)
+        if (frames is None):
+            self.miss_count += 1
+            return None
+        self.hit_count += 1
+        self.lru_keys.remove(key)
+        self.lru_keys.append(key)
+        return frames
+
+    # function to add frames to cache, return False if it is larger than the whole cache
+    def put(self, key, frames):
+        if (len(frames) > self.max_bytes):
+            return False
+        self.remove(key)
+        while (self.used_bytes + len(frames) > self.max_bytes):
+            self.remove(self.lru_keys[0])
+        self.entries[key] = frames
+        self.lru_keys.append(key)
+        self.used_bytes += len(frames)
+        return True
+
+    def remove(self, key):
+        frames = self.entries.pop(key, None)
+        if (frames is not None):
+            self.lru_keys.remove(key)
+            self.used_bytes -= len(frames)
+
+    def clear(self):
+        self.entries = {}
+        self.lru_keys = []
+        self.used_bytes = 0
+
+# one step of the compiled animation sequence
+class LedAnimationPlanStep():
+    __slots__ = ("animation_type", "duration", "attributes", "callbacks")
+
+    def __init__(self, animation_type, duration, attributes, callbacks):
+        self.animation_type = animation_type
+        self.duration = duration
+        self.attributes = attributes
+        self.callbacks = callbacks
+
+# animation sequence compiled by "compile_animation_seq", can be used as "animation_seq" of LedStripAnimationSeq
+# the steps are validated once, and LedStripAnimationSeq reuses one animation object (and its state) for each step
+class LedAnimationPlan():
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, i):
+        return self.steps[i]
+
+# validate the animation sequence and resolve the callbacks, raise ValueError for malformed steps
+# the callbacks are looked up now, so animations added later need the sequence compiled again
+def compile_animation_seq(animation_seq):
+    global led_animation_mapping_callbacks
+    steps = []
+    for i, step in enumerate(animation_seq):
+        if (not isinstance(step, (list, tuple))) or (len(step) < 2) or (len(step) > 3):
+            raise ValueError("animation_seq step %d: expect [name, duration] or [name, duration, attributes]" % i)
+        animation_type = step[0]
+        duration = step[1]
+        attributes = step[2] if len(step) > 2 else None
+        if (animation_type is not None) and (not isinstance(animation_type, str)):
+            raise ValueError("animation_seq step %d: animation name must be str or None" % i)
+        if (duration is None):
+            duration = 0
+        elif (not isinstance(duration, int)) or (isinstance(duration, bool)) or (duration < 0):
+            raise ValueError("animation_seq step %d: duration must be int >= 0 or None" % i)
+        if (attributes is None):
+            attributes = {}
+        elif (not isinstance(attributes, dict)):
+            raise ValueError("animation_seq step %d: attributes must be dict or None" % i)
+        speed = attributes.get("speed", None)
+        if (speed is not None) and ((not isinstance(speed, int)) or (speed < 0)):
+            raise ValueError("animation_seq step %d: speed must be int >= 0" % i)
+        if (attributes.get("transition", None) is not None):
+            try:
+                check_transition(attributes["transition"])
+            except ValueError as e:
+                raise ValueError("animation_seq step %d: %s" % (i, e))
+        callbacks = led_animation_mapping_callbacks.get(animation_type, None)
+        if (callbacks is not None) and (callbacks.get("setup", None) is None):
+            callbacks = None
+        steps.append(LedAnimationPlanStep(animation_type, duration, attributes, callbacks))
+    if (len(steps) == 0):
+        raise ValueError("animation_seq is empty")
+    return LedAnimationPlan(steps)
+
+# binary animation sequence file:
+#   header: b"LSEQ", version (u8), reserved (u8), step count (u16)
+#   index: offset (u32) and size (u16) of each step
+#   step: name, duration (u32), attributes
+#   name and attributes are tagged by one byte: "N" None, "T" / "F" bool, "B" u8, "i" i32, "f" f32,
+#   "s" str (u16 size), "l" list (u16 count), "d" dict (u16 count, then key and value pairs)
+# the file is created on the host by tools/encode_animation_seq.py
+LED_SEQ_FILE_MAGIC = b"LSEQ"
+LED_SEQ_FILE_VERSION = 1
+LED_SEQ_FILE_HEADER = "<4sBBH"
+LED_SEQ_FILE_INDEX = "<IH"
+
+# decode one value from "data" at "pos", return the value and the position after it
+def decode_value(data, pos):
+    tag = data[pos]
+    pos += 1
+    if (tag == 0x4E):       # "N"
+        return None, pos
+    if (tag == 0x54):       # "T"
+        return True, pos
+    if (tag == 0x46):       # "F"
+        return False, pos
+    if (tag == 0x42):       # "B"
+        return data[pos], pos + 1
+    if (tag == 0x69):       # "i"
+        return struct.unpack_from("<i", data, pos)[0], pos + 4
+    if (tag == 0x66):       # "f"
+        return struct.unpack_from("<f", data, pos)[0], pos + 4
+    count = struct.unpack_from("<H", data, pos)[0]
+    pos += 2
+    if (tag == 0x73):       # "s"
+        return str(data[pos:pos + count], "utf-8"), pos + count
+    if (tag == 0x6C):       # "l"
+        items = []
+        for i in range(count):
+            item, pos = decode_value(data, pos)
+            items.append(item)
+        return tuple(items), pos
+    if (tag == 0x64):       # "d"
+        items = {}
+        for i in range(count):
+            key, pos = decode_value(data, pos)
+            items[key], pos = decode_value(data, pos)
+        return items, pos
+    raise ValueError("unknown value tag %d" % tag)
+
+# animation sequence read from the binary file step by step, can be used as "animation_seq" of LedStripAnimationSeq
+# only the last two steps read (e.g. current and next step) are kept in memory
+# "file" is a path or a file opened as binary, the file opened by path is closed by "close"
+class LedAnimationSeqFile():
+    def __init__(self, file):
+        self.own_file = isinstance(file, str)
+        self.file = open(file, "rb") if self.own_file else file
+        header = self.file.read(struct.calcsize(LED_SEQ_FILE_HEADER))
+        if (len(header) != struct.calcsize(LED_SEQ_FILE_HEADER)):
+            raise ValueError("not an animation sequence file")
+        magic, version, reserved, self.step_count = struct.unpack(LED_SEQ_FILE_HEADER, header)
+        if (magic != LED_SEQ_FILE_MAGIC) or (version != LED_SEQ_FILE_VERSION):
+            raise ValueError("not an animation sequence file")
+        self.index_offset = len(header)
+        self.index_size = struct.calcsize(LED_SEQ_FILE_INDEX)
+        # two cached steps, the least recently used one is replaced
+        self.cache_index = [-1, -1]
+        self.cache_step = [None, None]
+        self.last_slot = 0
+
+    def __len__(self):
+        return self.step_count
+
+    # return the step as [name, duration, attributes]
+    def __getitem__(self, i):
+        if (i < 0):
+            i += self.step_count
+        if (i < 0) or (i >= self.step_count):
+            raise IndexError("animation step out of range")
+        for slot in range(2):
+            if (self.cache_index[slot] == i):
+                self.last_slot = slot
+                return self.cache_step[slot]
+        step = self.read_step(i)
+        slot = 1 - self.last_slot
+        self.cache_index[slot] = i
+        self.cache_step[slot] = step
+        self.last_slot = slot
+        return step
+
+    # read the step into the cache ahead of time, e.g. the next step
+    def preload(self, i):
+        last_slot = self.last_slot
+        self[i]
+        # keep the current step as the most recently used one
+        if (self.cache_index[last_slot] != i):
+            self.last_slot = last_slot
+
+    def read_step(self, i):
+        f = self.file
+        f.seek(self.index_offset + i * self.index_size)
+        offset, size = struct.unpack(LED_SEQ_FILE_INDEX, f.read(self.index_size))
+        f.seek(offset)
+        data = f.read(size)
+        if (len(data) != size):
+            raise ValueError("animation sequence file is truncated")
+        name, pos = decode_value(data, 0)
+        duration = struct.unpack_from("<I", data, pos)[0]
+        attributes, pos = decode_value(data, pos + 4)
+        return [name, duration, attributes]
+
+    def close(self):
+        if (self.own_file) and (self.file is not None):
+            self.file.close()
+        self.file = None
+
 class LedStripAnimation():
-    def __init__(self, led_driver, animation_type, attributes):
+    # "callbacks" is the resolved animation callbacks, default to look up by "animation_type"
+    # "auto_start" is False to create the animation without starting it, call "start" later (can be called again to restart)
+    def __init__(self, led_driver, animation_type, attributes, enable_stats = False, fixed_rate = False, catch_up = "skip", start_time_ms = None,
+                 frame_cache = None, callbacks = None, auto_start = True):
         global led_animation_mapping_callbacks
         self.led_driver = led_driver
+        self.fixed_rate = fixed_rate
+        self.catch_up = catch_up
+        self.max_burst_frames = 8
         self.animation_type = animation_type
         self.attributes = attributes if attributes is not None else {}
-        self.led_animation_callbacks = led_animation_mapping_callbacks.get(self.animation_type, None)
-        self.state = {}
+        self.led_animation_callbacks = callbacks if callbacks is not None else led_animation_mapping_callbacks.get(self.animation_type, None)
+        self.setup_callback = None
+        self.reset_callback = None
+        self.stop_callback = None
+        self.next_step_callback = None
+        self.render_callback = None
+        if (self.led_animation_callbacks is not None):
+            self.setup_callback = self.led_animation_callbacks.get("setup", None)
+        if (self.setup_callback is not None):
+            self.reset_callback = self.led_animation_callbacks.get("reset", None)
+            self.stop_callback = self.led_animation_callbacks.get("stop", None)
+            self.next_step_callback = self.led_animation_callbacks.get("next_step", None)
+            self.render_callback = self.led_animation_callbacks.get("render", None)
+        else:     # No setup match, assume all LEDs are off
+            self.led_animation_callbacks = None
+        self.state = None
+        self.compact_state = False
+        self.stats = LedAnimationStats(animation_type) if enable_stats else None
+        self.start_time_ms = None
+        self.next_delay = None
+        self.next_action_time_ms = None
+
+        # frame cache for periodic animation
+        self.frame_cache = frame_cache
+        self.frame_cache_checked = False
+        self.cache_key = None
+        self.frame_index = 0
+        self.cached_frames = None
+        # which frames of the period are recorded, None when all frames are ready
+        self.cached_flags = None
+
+        if (auto_start):
+            self.start(start_time_ms)
+
+    # function to start (or restart) the animation
+    # the state of last run is reused if the animation has "reset" callback, otherwise "setup" again
+    def start(self, start_time_ms = None):
+        if (self.stats is not None):
+            self.stats.__init__(self.animation_type)
+            setup_start_us = ticks_us()
+        # time of the first frame, for the "render" callback
+        self.start_time_ms = start_time_ms if start_time_ms is not None else ticks_ms()
         
         # Setup animation
-        led_animation_setup = None
-        if (self.led_animation_callbacks is not None):
-            led_animation_setup = self.led_animation_callbacks.get("setup", None)
-        if (led_animation_setup is not None):
-            self.state = led_animation_setup(self.led_driver, self.attributes)
+        if (self.setup_callback is not None):
+            if (self.state is not None) and (self.reset_callback is not None):
+                self.state = self.reset_callback(self.led_driver, self.state)
+            else:
+                self.state = self.setup_callback(self.led_driver, self.attributes)
             if (self.state is None):
                 self.state = {}
         else:     # No setup match, assume all LEDs are off
-            self.led_animation_callbacks = None
-            for i in range(len(self.led_driver)):
-                self.led_driver[i] = (0, 0, 0)
+            self.led_driver.fill((0, 0, 0))
+            if (self.state is None):
+                self.state = {}
 
-        self.next_delay = self.state.get("__next_delay__", None)
+        self.compact_state = isinstance(self.state, LedAnimationState)
+        self.next_delay = self.state.next_delay if self.compact_state else self.state.get("__next_delay__", None)
         if (self.next_delay is None):
             self.next_delay = self.attributes.get("speed", 500) if (isinstance(self.attributes, dict)) else 500
-        self.state["__next_delay__"] = self.next_delay
-        self.next_action_time_ms = None if self.next_delay is None or self.next_delay == 0 else ticks_ms() + self.next_delay
+        if (self.compact_state):
+            self.state.next_delay = self.next_delay
+        else:
+            self.state["__next_delay__"] = self.next_delay
+        self.next_action_time_ms = None if self.next_delay is None or self.next_delay == 0 else ticks_add(self.start_time_ms, self.next_delay)
+
+        self.frame_index = 0
+        if (self.frame_cache is not None):
+            self.setup_frame_cache()
 
         # Set LED lights
         self.led_driver.write()
+        if (self.stats is not None):
+            self.stats.setup_us = ticks_diff(ticks_us(), setup_start_us)
+
+    # function to change the LED driver the animation draw to, e.g. by LedTransition
+    # the frame cache is only kept if the new driver also has a buffer to record the frames from
+    def set_led_driver(self, led_driver):
+        self.led_driver = led_driver
+        if (self.cache_key is not None) and (led_driver.buffer_callback() is None):
+            self.cache_key = None
+            self.cached_frames = None
+            self.cached_flags = None
+
+    # function to run "stop" callback when the animation is replaced, e.g. to close files
+    # the animation can be started again, "reset" should then reopen what "stop" closed
+    def stop(self):
+        if (self.stop_callback is not None) and (self.state is not None):
+            self.stop_callback(self.led_driver, self.state)
+        # the recorded frames are kept by the frame cache only, within its "max_bytes"
+        self.cached_frames = None
+        self.cached_flags = None
 
     # function to check if any event triggered by time
-    def check_event(self):
+    # animation with "render" callback draw the frame of the time since it start, otherwise run the next step
+    # "inclusive" is True to also run the event at the exact scheduled time (e.g. for the hardware timer, which fire on time)
+    def check_event(self, now = None, inclusive = False):
         if (self.animation_type is not None):
             if (self.next_action_time_ms is not None):
-                if (ticks_diff(ticks_ms(), self.next_action_time_ms) > 0):
-                    self.trigger_event()
+                if (now is None):
+                    now = ticks_ms()
+                lateness_ms = ticks_diff(now, self.next_action_time_ms)
+                if (lateness_ms > 0) or ((inclusive) and (lateness_ms == 0)):
+                    self.trigger_event(lateness_ms, ticks_diff(now, self.start_time_ms) if self.render_callback is not None else None)
     
     # trigger event (animation next step)
-    def trigger_event(self):
-        led_animation_next_step_callback = None
-        if (self.led_animation_callbacks is not None):
-            led_animation_next_step_callback = self.led_animation_callbacks.get("next_step", None)
-        if (led_animation_next_step_callback is not None):
-            self.state = led_animation_next_step_callback(self.led_driver, self.state)
-            if (self.state is None):
-                self.state = {}
-            new_next_delay = self.state.get("__next_delay__", None)
-            if (new_next_delay is not None):
-                self.next_delay = new_next_delay
-        self.next_action_time_ms = None if self.next_delay is None or self.next_delay == 0 else ticks_ms() + self.next_delay
+    # "lateness_ms" is how late the event is from the scheduled time, only for statistics
+    # "elapsed_ms" is the time since the animation start, to use "render" callback instead of "next_step"
+    def trigger_event(self, lateness_ms = None, elapsed_ms = None):
+        if (self.stats is not None):
+            start_us = ticks_us()
+            start_write_us = self.led_driver.write_us
+            next_delay = self.next_delay
+        if (self.render_callback is not None) and ((elapsed_ms is not None) or (self.next_step_callback is None)):
+            if (elapsed_ms is None):
+                elapsed_ms = ticks_diff(ticks_ms(), self.start_time_ms)
+            self.frame_index = elapsed_ms // self.next_delay if (self.next_delay is not None) and (self.next_delay > 0) else 0
+            if (self.cached_frames is None) or (not self.play_cached_frame()):
+                self.state = self.render_callback(self.led_driver, self.state, elapsed_ms)
+                self.update_next_delay()
+                if (self.cached_flags is not None):
+                    self.record_cached_frame()
+        elif (self.next_step_callback is not None):
+            self.frame_index += 1
+            if (self.cached_frames is None) or (not self.play_cached_frame()):
+                self.state = self.next_step_callback(self.led_driver, self.state)
+                self.update_next_delay()
+                if (self.cached_flags is not None):
+                    self.record_cached_frame()
+        self.schedule_next_event()
+        if (self.stats is not None):
+            write_us = (self.led_driver.write_us - start_write_us) if start_write_us is not None else 0
+            self.stats.add_tick(ticks_diff(ticks_us(), start_us) - write_us, write_us, lateness_ms, next_delay)
+
+    # function to read the step interval from the state returned by "next_step" or "render", which can change it
+    def update_next_delay(self):
+        if (self.state is None):
+            self.state = {}
+            self.compact_state = False
+        new_next_delay = self.state.next_delay if self.compact_state else self.state.get("__next_delay__", None)
+        if (new_next_delay is not None):
+            self.next_delay = new_next_delay
+
+    # use the cached frames if the same animation (with same attributes) has run before,
+    # otherwise record the frames of the first period
+    def setup_frame_cache(self):
+        if (not self.frame_cache_checked):
+            self.frame_cache_checked = True
+            period_callback = self.led_animation_callbacks.get("period", None) if self.led_animation_callbacks is not None else None
+            if (period_callback is None) or (not isinstance(self.attributes, dict)):
+                return
+            period = period_callback(self.led_driver, self.state)
+            buf = self.led_driver.buffer_callback()
+            if (period is None) or (period <= 0) or (buf is None):
+                return
+            self.frame_period = period
+            self.frame_size = len(buf)
+            # the frames are raw bytes in "blit" order, so only strips with the same byte layout can share them
+            led_driver = self.led_driver
+            order = tuple(led_driver.order) if led_driver.native_buffer is not None else (0, 1, 2, 3)
+            self.cache_key = (self.animation_type, repr(sorted(self.attributes.items())), self.frame_size, led_driver.bpp, order)
+        if (self.cache_key is None):
+            return
+        self.cached_slot = 0
+        cached_frames = self.frame_cache.get(self.cache_key)
+        if (cached_frames is not None):
+            self.cached_frames = cached_frames
+            self.cached_flags = None
+            return
+        if (self.cached_flags is None):
+            # recorded at last run but removed from the cache, the cache is the only owner of the frames so record again
+            self.cached_frames = None
+        if (self.frame_period * self.frame_size > self.frame_cache.max_bytes):
+            return
+        if (self.cached_frames is None):
+            self.cached_frames = bytearray(self.frame_period * self.frame_size)
+            self.cached_flags = bytearray(self.frame_period)
+        else:
+            # restart recording
+            for i in range(self.frame_period):
+                self.cached_flags[i] = 0
+        self.record_cached_frame()
+
+    # function to show the cached frame of "frame_index", return False if the frames are not all recorded
+    def play_cached_frame(self):
+        if (self.cached_flags is not None):
+            return False
+        slot = self.frame_index % self.frame_period
+        if (slot != self.cached_slot):
+            self.cached_slot = slot
+            frame_size = self.frame_size
+            self.led_driver.blit(memoryview(self.cached_frames)[slot * frame_size:(slot + 1) * frame_size], 0)
+            self.led_driver.write()
+        return True
+
+    # function to save current frame, add to the cache when all frames of a period are recorded
+    def record_cached_frame(self):
+        slot = self.frame_index % self.frame_period
+        self.cached_slot = slot
+        if (self.cached_flags[slot]):
+            return
+        buf = self.led_driver.buffer_callback()
+        if (buf is None):
+            # the driver has changed to one without buffer, stop recording
+            self.cache_key = None
+            self.cached_frames = None
+            self.cached_flags = None
+            return
+        frame_size = self.frame_size
+        self.cached_frames[slot * frame_size:(slot + 1) * frame_size] = buf
+        self.cached_flags[slot] = 1
+        if (min(self.cached_flags) == 1):
+            self.cached_flags = None
+            self.frame_cache.put(self.cache_key, self.cached_frames)
+
+    # function to set the time of next event
+    def schedule_next_event(self):
+        if (self.next_delay is None) or (self.next_delay == 0):
+            self.next_action_time_ms = None
+            return
+        now = ticks_ms()
+        if (not self.fixed_rate) or (self.next_action_time_ms is None):
+            self.next_action_time_ms = ticks_add(now, self.next_delay)
+            return
+        # fixed rate, count from the last scheduled time
+        next_time = ticks_add(self.next_action_time_ms, self.next_delay)
+        overrun = ticks_diff(now, next_time)
+        if (overrun >= 0):
+            missed_frames = overrun // self.next_delay + 1
+            if (self.catch_up != "burst") or (missed_frames > self.max_burst_frames):
+                # skip the missed frames, keep in phase with the original schedule
+                next_time = ticks_add(next_time, missed_frames * self.next_delay)
+                if (self.stats is not None):
+                    self.stats.skipped_frame_count += missed_frames
+            # for "burst", keep the overrun time so that the next frame run right away
+        self.next_action_time_ms = next_time
+
+
+
+#####################################
+# Animation kernels
+#####################################
+# building blocks of the preset animations, also for customized animations added by "add_led_strip_animation"
+# each kernel draw by bulk copies of packed bytes (see "LedDriverWrapper.fill_pattern" and "set_frame"),
+# so the animations composed from them get the fast path of the LED driver
+
+# compact states of the preset animations, colors are packed as bytes (see "LedDriverWrapper.pack_color")
+# state of the shifting animations: the frame buffer and the rotation offset
+class LedRotateFrameState(LedAnimationState):
+    __slots__ = ("frame", "offset")
+
+    def __init__(self, frame, offset = 0, next_delay = None):
+        self.next_delay = next_delay
+        self.frame = frame
+        self.offset = offset
+
+# "shift" is 1 for "down", -1 for "up" and 0 for not moving
+class LedFillAndMoveState(LedRotateFrameState):
+    __slots__ = ("shift", "color_count")
+
+    def __init__(self, frame, shift, color_count, next_delay = None):
+        self.next_delay = next_delay
+        self.frame = frame
+        self.offset = 0
+        self.shift = shift
+        self.color_count = color_count
+
+# state of the fading animations: "levels" is the packed pattern of each level, from 0 to "step"
+class LedFadeState(LedAnimationState):
+    __slots__ = ("is_glowing", "step", "cur_step", "start_step", "levels")
+
+    def __init__(self, step, start_step, levels, next_delay = None):
+        self.next_delay = next_delay
+        self.is_glowing = start_step == 0
+        self.step = step
+        self.cur_step = start_step
+        self.start_step = start_step
+        self.levels = levels
+
+# for "render" callback, the number of steps should be done after "elapsed_ms"
+# support both compact state and dict state
+def get_step_count(state, elapsed_ms):
+    next_delay = state.next_delay if isinstance(state, LedAnimationState) else state.get("__next_delay__", None)
+    if (next_delay is None) or (next_delay <= 0):
+        return 0
+    return elapsed_ms // next_delay
+
+# rotate:
+# keep the rendered pattern as frame buffer and only move a rotation offset on each step,
+# so each step is a bulk copy of the frame buffer instead of moving LEDs one by one
+def rotate_frame_setup(led_driver):
+    return LedRotateFrameState(memoryview(led_driver.get_frame()))
+
+# show the saved frame again for restarting the animation
+def rotate_frame_reset(led_driver, state):
+    state.offset = 0
+    led_driver.set_frame(state.frame, 0)
+    led_driver.write()
+    return state
+
+def rotate_frame_next_step(led_driver, state, shift):
+    offset = led_driver.remap_led_index(state.offset + shift)
+    state.offset = offset
+    led_driver.set_frame(state.frame, offset)
+    led_driver.write()
+    return state
+
+def rotate_frame_render(led_driver, state, elapsed_ms, shift):
+    offset = led_driver.remap_led_index(get_step_count(state, elapsed_ms) * shift)
+    if (offset != state.offset):
+        state.offset = offset
+        led_driver.set_frame(state.frame, offset)
+        led_driver.write()
+    return state
+
+# pattern fill:
+# packed pattern of the colors one after another, e.g. for "fill_pattern"
+def pack_pattern(led_driver, color_list):
+    return b"".join(led_driver.pack_color(colors) for colors in color_list)
+
+# packed pattern of even and odd LEDs with different values, or one LED if not alternate
+def pack_alternate(led_driver, even_value, odd_value, is_alternate):
+    if (is_alternate):
+        return led_driver.pack_color(even_value) + led_driver.pack_color(odd_value)
+    return led_driver.pack_color(even_value)
+
+# fill all LEDs with the packed pattern and write
+def show_pattern(led_driver, pattern):
+    led_driver.fill_pattern(pattern)
+    led_driver.write()
+
+# scale:
+# scale the color by "numerator / denominator" with integer only math (no FPU needed)
+def scale_color(colors, numerator, denominator):
+    return tuple(int(c * numerator // denominator) for c in colors)
+
+# the colors of "step + 1" brightness levels, from off to full color
+def scale_levels(colors, step):
+    return tuple(scale_color(colors, i, step) for i in range(step + 1))
+
+# scale all LEDs by "numerator / denominator" in place, e.g. to fade out the trails of a customized animation
+# "lut" from "scale_lut" can be given instead to avoid building the table on each call
+def scale_frame(led_driver, numerator = None, denominator = 255, lut = None):
+    if (lut is None):
+        lut = scale_lut(numerator, denominator)
+    buf = led_driver.buffer()
+    if (buf is not None):
+        blend_copy(buf, buf, lut)
+    else:
+        frame = led_driver.get_frame()
+        blend_copy(frame, frame, lut)
+        led_driver.set_frame(frame)
+
+# gradient:
+# lookup table of the tail colors, from the head (full color) to the end of the tail
+def tail_gradient(colors, tail_count):
+    return tuple(scale_color(colors, tail_count - j, tail_count) for j in range(tail_count))
 
+# draw the colors from LED "position", moving by "direction" (1 or -1) and wrapping around the strip
+def draw_gradient(led_driver, position, gradient, direction = 1):
+    position = led_driver.remap_led_index(position)
+    for colors in gradient:
+        led_driver[position] = colors
+        position = led_driver.remap_led_index(position + direction)
 
+# fade:
+# move through the packed "levels" from 0 to "step" and back, i.e. one period is "step * 2" steps
+# with "step = 1" the two levels are shown one after another
+def fade_setup(led_driver, levels, start_from_off = True):
+    step = len(levels) - 1
+    state = LedFadeState(step, 0 if start_from_off else step, levels)
+    show_pattern(led_driver, levels[state.cur_step])
+    return state
+
+def fade_reset(led_driver, state):
+    state.is_glowing = state.start_step == 0
+    state.cur_step = state.start_step
+    show_pattern(led_driver, state.levels[state.cur_step])
+    return state
+
+def fade_next_step(led_driver, state):
+    step = state.step
+    # start next step
+    if (state.is_glowing):
+        state.cur_step += 1
+        if (state.cur_step >= step):
+            state.cur_step = step
+            state.is_glowing = False
+    else:
+        state.cur_step -= 1
+        if (state.cur_step <= 0):
+            state.cur_step = 0
+            state.is_glowing = True
+    show_pattern(led_driver, state.levels[state.cur_step])
+    return state
+
+def fade_render(led_driver, state, elapsed_ms):
+    step = state.step
+    # one period is glowing from 0 to "step" then dimming back to 0
+    phase = (get_step_count(state, elapsed_ms) + state.start_step) % (step * 2)
+    cur_step = phase if phase <= step else step * 2 - phase
+    if (cur_step != state.cur_step):
+        state.is_glowing = phase < step
+        state.cur_step = cur_step
+        show_pattern(led_driver, state.levels[cur_step])
+    return state
+
+def fade_period(led_driver, state):
+    return state.step * 2
+
+# packed pattern of each level for "fade_setup", the odd LEDs fade the other way if alternate
+def fade_levels(led_driver, colors, step, is_alternate = False):
+    colors_levels = scale_levels(colors, step)
+    return tuple(pack_alternate(led_driver, colors_levels[i], colors_levels[step - i], is_alternate) for i in range(step + 1))
 
 #####################################
 # Preset animation functions
 #####################################
-def move_down_with_tail_setup(led_driver, attributes):
+# "direction" is 1 to move down (tail toward the higher index) and -1 to move up
+def move_with_tail_setup(led_driver, attributes, direction):
     if (attributes is None):
         attributes = {}
     active_count = attributes.get("active_count", 1)
@@ -229,73 +1942,53 @@ def move_down_with_tail_setup(led_driver, attributes):
     colors = attributes.get("colors", (200, 200, 200))
     # start setup
     led_driver.fill((0, 0, 0))
-    active_count_distance = len(led_driver) / active_count
-    next_led_position_double = 0
-    next_led_position = 0
+    active_count_distance = len(led_driver) / active_count * direction
+    next_led_position_double = 0 if direction > 0 else len(led_driver)
+    next_led_position = next_led_position_double
     for i in range(active_count):
         led_position_double = next_led_position_double
         led_position = next_led_position
         next_led_position_double = led_position_double + active_count_distance
         next_led_position = math.floor(next_led_position_double)
-        tail_count = min(next_led_position - led_position, max_tail_count)
-        for j in range(tail_count):
-            led_driver[led_position] = (math.floor((tail_count - j) / tail_count * colors[0]),
-                                            math.floor((tail_count - j) / tail_count * colors[1]),
-                                            math.floor((tail_count - j) / tail_count * colors[2]))
-            led_position = led_driver.remap_led_index(led_position + 1)
-        led_driver.write()
+        tail_count = min((next_led_position - led_position) * direction, max_tail_count)
+        # moving up, the tail start from the LED before the position
+        draw_gradient(led_driver, led_position if direction > 0 else led_position - 1, tail_gradient(colors, tail_count), direction)
+    led_driver.write()
+    return rotate_frame_setup(led_driver)
+
+def move_down_with_tail_setup(led_driver, attributes):
+    return move_with_tail_setup(led_driver, attributes, 1)
 
 def move_down_with_tail_next_step(led_driver, state):
     # start next step
-    pos_0_value = led_driver[0]
-    for i in range(len(led_driver)):
-        led_driver[i] = led_driver[led_driver.remap_led_index(i + 1)]
-    led_driver[len(led_driver) - 1] = pos_0_value
-    led_driver.write()
+    return rotate_frame_next_step(led_driver, state, 1)
+
+def move_down_with_tail_render(led_driver, state, elapsed_ms):
+    return rotate_frame_render(led_driver, state, elapsed_ms, 1)
 
 add_led_strip_animation("move_down_with_tail", {
         "setup": move_down_with_tail_setup,
-        "next_step": move_down_with_tail_next_step
+        "reset": rotate_frame_reset,
+        "next_step": move_down_with_tail_next_step,
+        "render": move_down_with_tail_render
     })
 
 
 def move_up_with_tail_setup(led_driver, attributes):
-    if (attributes is None):
-        attributes = {}
-    active_count = attributes.get("active_count", 1)
-    max_tail_count = attributes.get("max_tail_count", 10)
-    if (max_tail_count <= 0):
-        max_tail_count = 1
-    colors = attributes.get("colors", (200, 200, 200))
-    # start setup
-    led_driver.fill((0, 0, 0))
-    active_count_distance = len(led_driver) / active_count
-    next_led_position_double = len(led_driver)
-    next_led_position = len(led_driver)
-    for i in range(active_count):
-        led_position_double = next_led_position_double
-        led_position = next_led_position
-        next_led_position_double = led_position_double - active_count_distance
-        next_led_position = math.floor(next_led_position_double)
-        tail_count = min(led_position - next_led_position, max_tail_count)
-        for j in range(tail_count):
-            led_driver[led_position - 1] = (math.floor((tail_count - j) / tail_count * colors[0]),
-                                            math.floor((tail_count - j) / tail_count * colors[1]),
-                                            math.floor((tail_count - j) / tail_count * colors[2]))
-            led_position = led_driver.remap_led_index(led_position - 1)
-        led_driver.write()
+    return move_with_tail_setup(led_driver, attributes, -1)
 
 def move_up_with_tail_next_step(led_driver, state):
     # start next step
-    last_pos_value = led_driver[len(led_driver) - 1]
-    for i in reversed(range(len(led_driver))):
-        led_driver[led_driver.remap_led_index(i + 1)] = led_driver[i]
-    led_driver[0] = last_pos_value
-    led_driver.write()
+    return rotate_frame_next_step(led_driver, state, -1)
+
+def move_up_with_tail_render(led_driver, state, elapsed_ms):
+    return rotate_frame_render(led_driver, state, elapsed_ms, -1)
 
 add_led_strip_animation("move_up_with_tail", {
         "setup": move_up_with_tail_setup,
-        "next_step": move_up_with_tail_next_step
+        "reset": rotate_frame_reset,
+        "next_step": move_up_with_tail_next_step,
+        "render": move_up_with_tail_render
     })
 
 
@@ -307,40 +2000,39 @@ def fill_and_move_setup(led_driver, attributes):
     if (not isinstance(color_list[0], (list, tuple))):
         color_list = (color_list, )
     # start setup
-    if len(color_list) > 1:
-        for i in range(len(led_driver)):
-            led_driver[i] = color_list[i % len(color_list)]
-    else:
-        led_driver.fill(color_list[0])
-    led_driver.write()
-    state = {
-        "direction" : direction,
-        }
-    return state
+    show_pattern(led_driver, pack_pattern(led_driver, color_list))
+    shift = 1 if direction == 'down' else -1 if direction == 'up' else 0
+    # the frame is also used to show the pattern again by "reset"
+    return LedFillAndMoveState(memoryview(led_driver.get_frame()), shift, len(color_list))
 
 def fill_and_move_next_step(led_driver, state):
-    direction = state.get("direction", None)
     # start next step
-    if (direction == 'up'):
-        last_pos_value = led_driver[len(led_driver) - 1]
-        for i in reversed(range(len(led_driver))):
-            led_driver[led_driver.remap_led_index(i + 1)] = led_driver[i]
-        led_driver[0] = last_pos_value
-        led_driver.write()
-    elif (direction == 'down'):
-        pos_0_value = led_driver[0]
-        for i in range(len(led_driver)):
-            led_driver[i] = led_driver[led_driver.remap_led_index(i + 1)]
-        led_driver[len(led_driver) - 1] = pos_0_value
-        led_driver.write()
+    if (state.shift != 0):
+        rotate_frame_next_step(led_driver, state, state.shift)
+    return state
+
+def fill_and_move_render(led_driver, state, elapsed_ms):
+    if (state.shift != 0):
+        rotate_frame_render(led_driver, state, elapsed_ms, state.shift)
     return state
 
+# the pattern repeat after the number of colors if it fit the strip, otherwise after moving the whole strip
+def fill_and_move_period(led_driver, state):
+    if (state.shift == 0):
+        return 1
+    color_count = state.color_count
+    return color_count if len(led_driver) % color_count == 0 else len(led_driver)
+
 add_led_strip_animation("fill_and_move", {
         "setup": fill_and_move_setup,
-        "next_step": fill_and_move_next_step
+        "reset": rotate_frame_reset,
+        "next_step": fill_and_move_next_step,
+        "render": fill_and_move_render,
+        "period": fill_and_move_period
     })
 
 
+# blink is a fade of two levels: off and the color (swapped on odd LEDs if alternate)
 def blink_setup(led_driver, attributes):
     if (attributes is None):
         attributes = {}
@@ -348,42 +2040,14 @@ def blink_setup(led_driver, attributes):
     is_alternate = attributes.get("is_alternate", False)
     colors = attributes.get("colors", (200, 200, 200))
     # start setup
-    cur_led_state = not start_from_off
-    if (is_alternate):
-        even_value = colors if cur_led_state else (0, 0, 0)
-        odd_value = (0, 0, 0) if cur_led_state else colors
-        for i in range(len(led_driver)):
-            led_driver[i] = even_value if i % 2 == 0 else odd_value
-    else:
-        led_driver.fill(colors if cur_led_state else (0, 0, 0))
-    led_driver.write()
-    state = {
-        "cur_led_state" : cur_led_state,
-        "is_alternate": is_alternate,
-        "colors": colors
-        }
-    return state
-
-def blink_next_step(led_driver, state):
-    cur_led_state = state.get("cur_led_state", True)
-    is_alternate = state.get("is_alternate", False)
-    colors = state.get("colors", (200, 200, 200))
-    # start next step
-    cur_led_state = not cur_led_state
-    state["cur_led_state"] = cur_led_state
-    if (is_alternate):
-        even_value = colors if cur_led_state else (0, 0, 0)
-        odd_value = (0, 0, 0) if cur_led_state else colors
-        for i in range(len(led_driver)):
-            led_driver[i] = even_value if i % 2 == 0 else odd_value
-    else:
-        led_driver.fill(colors if cur_led_state else (0, 0, 0))
-    led_driver.write()
-    return state
+    return fade_setup(led_driver, fade_levels(led_driver, colors, 1, is_alternate), start_from_off)
 
 add_led_strip_animation("blink", {
         "setup": blink_setup,
-        "next_step": blink_next_step
+        "reset": fade_reset,
+        "next_step": fade_next_step,
+        "render": fade_render,
+        "period": fade_period
     })
 
 
@@ -397,53 +2061,145 @@ def breath_setup(led_driver, attributes):
         step = 2
     colors = attributes.get("colors", (200, 200, 200))
     # start setup
-    is_glowing = start_from_off
-    if (is_alternate):
-        even_value = (0, 0, 0) if is_glowing else colors
-        odd_value = colors if is_glowing else (0, 0, 0)
-        for i in range(len(led_driver)):
-            led_driver[i] = even_value if i % 2 == 0 else odd_value
-    else:
-        led_driver.fill((0, 0, 0) if start_from_off else colors)
-    led_driver.write()
-    state = {
-        "is_glowing" : is_glowing,
-        "step": step,
-        "cur_step": 0 if is_glowing else step,
-        "is_alternate": is_alternate,
-        "colors": colors,
-        }
+    # only "step + 1" brightness levels can appear, prepare them once here
+    return fade_setup(led_driver, fade_levels(led_driver, colors, step, is_alternate), start_from_off)
+
+add_led_strip_animation("breath", {
+        "setup": breath_setup,
+        "reset": fade_reset,
+        "next_step": fade_next_step,
+        "render": fade_render,
+        "period": fade_period
+    })
+
+# copy frames of raw bytes in "color_order" (e.g. "RGB", bytes of all LEDs one after another) to the LED driver by one bulk copy
+# the colors are reordered to the driver byte order if different
+class LedFrameCopier():
+    __slots__ = ("led_driver", "color_order", "frame_size", "source_order", "target_order", "direct_copy", "lut", "reorder_buffer")
+
+    def __init__(self, led_driver, color_order, frame_size):
+        self.led_driver = led_driver
+        self.color_order = color_order
+        self.frame_size = frame_size
+        bpp = led_driver.bpp
+        if (len(color_order) != bpp):
+            raise ValueError("color_order %r does not match %d bytes per LED" % (color_order, bpp))
+        # position of each color in the frame, same as "order" of the driver
+        self.source_order = tuple(color_order.index("RGBW"[c]) for c in range(bpp))
+        # with native buffer the bytes of LED driver order is needed, otherwise "blit" take the bytes in color order (R, G, B)
+        native = led_driver.native_buffer is not None
+        self.target_order = tuple(led_driver.order[:bpp]) if native else tuple(range(bpp))
+        self.direct_copy = self.source_order == self.target_order
+        self.lut = None if self.direct_copy else scale_lut(255)
+        self.reorder_buffer = None if self.direct_copy or native else bytearray(frame_size)
+
+    def copy(self, led_driver, frame):
+        if (led_driver is not self.led_driver):
+            # the animation is moved to another driver (e.g. by LedTransition), which can have another buffer layout
+            self.__init__(led_driver, self.color_order, self.frame_size)
+        if (self.direct_copy):
+            led_driver.blit(frame, 0)
+            return
+        dst = self.reorder_buffer if self.reorder_buffer is not None else led_driver.buffer()
+        bpp = led_driver.bpp
+        for c in range(bpp):
+            apply_channel_lut(dst, self.target_order[c], frame, self.source_order[c], bpp, self.lut)
+        if (dst is self.reorder_buffer):
+            led_driver.blit(dst, 0)
+
+# play raw frame files, each frame is the bytes of all LEDs in "color_order" (e.g. RGB RGB ...)
+# attributes:
+#   "file": path or file opened as binary
+#   "speed": ms per frame (default 40)
+#   "color_order": byte order of the file (default "RGB"), must have the same bytes per LED as the driver
+#   "led_count": LEDs in each frame (default the whole strip), shown from LED 0
+#   "loop": play again from the first frame at the end (default True), otherwise stay at the last frame
+#   "chunk_size": bytes read from the file at once (default 4096), at least one frame
+class LedFrameFileState(LedAnimationState):
+    __slots__ = ("path", "file", "frame_size", "frame_count", "loop", "chunk", "chunk_view",
+                 "chunk_start", "chunk_frames", "frame_index", "copier")
+
+    def __init__(self, next_delay = None):
+        self.next_delay = next_delay
+
+def frame_file_setup(led_driver, attributes):
+    if (attributes is None):
+        attributes = {}
+    file = attributes.get("file", None)
+    if (file is None):
+        raise ValueError("frame_file need \"file\" attribute")
+    bpp = led_driver.bpp
+    state = LedFrameFileState(attributes.get("speed", 40))
+    # only the file opened by path is closed by "stop"
+    state.path = file if isinstance(file, str) else None
+    state.file = None if isinstance(file, str) else file
+    state.frame_size = min(attributes.get("led_count", len(led_driver)), len(led_driver)) * bpp
+    state.loop = attributes.get("loop", True)
+    chunk_frames = max(attributes.get("chunk_size", 4096) // state.frame_size, 1)
+    state.chunk = bytearray(chunk_frames * state.frame_size)
+    state.chunk_view = memoryview(state.chunk)
+    state.chunk_start = 0
+    state.chunk_frames = 0
+    state.frame_index = 0
+    state.copier = LedFrameCopier(led_driver, attributes.get("color_order", "RGB"), state.frame_size)
+    frame_file_open(state)
+    frame_file_show(led_driver, state, 0)
     return state
 
-def breath_next_step(led_driver, state):
-    is_glowing = state.get("is_glowing", True)
-    step = state.get("step", 10)
-    cur_step = state.get("cur_step", 0)
-    is_alternate = state.get("is_alternate", False)
-    colors = state.get("colors", (200, 200, 200))
-    # start next step
-    if (is_glowing):
-        cur_step += 1
-        if (cur_step >= step):
-            cur_step = step
-            is_glowing = False
-    else:
-        cur_step -= 1
-        if (cur_step <= 0):
-            cur_step = 0
-            is_glowing = True
-    state["is_glowing"] = is_glowing
-    state["cur_step"] = cur_step
-    for i in range(len(led_driver)):
-        cur_led_ratio = cur_step if ((not is_alternate) or (i % 2 == 0)) else step - cur_step
-        led_driver[i] = (math.floor(colors[0] * cur_led_ratio / step),
-                         math.floor(colors[1] * cur_led_ratio / step),
-                         math.floor(colors[2] * cur_led_ratio / step))
+def frame_file_open(state):
+    if (state.file is None):
+        state.file = open(state.path, "rb")
+    state.file.seek(0, 2)
+    state.frame_count = state.file.tell() // state.frame_size
+    state.chunk_frames = 0
+    if (state.frame_count == 0):
+        raise ValueError("frame_file has no complete frame")
+
+# index of the frame to show after "step_count" steps
+def frame_file_index(state, step_count):
+    if (state.loop):
+        return step_count % state.frame_count
+    return min(step_count, state.frame_count - 1)
+
+# show frame "index", the file is read by chunks of frames into the same buffer
+def frame_file_show(led_driver, state, index):
+    index = frame_file_index(state, index)
+    state.frame_index = index
+    chunk_index = index - state.chunk_start
+    if (chunk_index < 0) or (chunk_index >= state.chunk_frames):
+        state.file.seek(index * state.frame_size)
+        state.chunk_start = index
+        state.chunk_frames = state.file.readinto(state.chunk) // state.frame_size
+        chunk_index = 0
+    frame_size = state.frame_size
+    frame = state.chunk_view[chunk_index * frame_size:(chunk_index + 1) * frame_size]
+    state.copier.copy(led_driver, frame)
     led_driver.write()
+
+def frame_file_reset(led_driver, state):
+    frame_file_open(state)
+    frame_file_show(led_driver, state, 0)
     return state
 
-add_led_strip_animation("breath", {
-        "setup": breath_setup,
-        "next_step": breath_next_step
-    })
+def frame_file_stop(led_driver, state):
+    if (state.path is not None) and (state.file is not None):
+        state.file.close()
+        state.file = None
 
+def frame_file_next_step(led_driver, state):
+    frame_file_show(led_driver, state, state.frame_index + 1)
+    return state
+
+def frame_file_render(led_driver, state, elapsed_ms):
+    index = frame_file_index(state, get_step_count(state, elapsed_ms))
+    if (index != state.frame_index):
+        frame_file_show(led_driver, state, index)
+    return state
+
+add_led_strip_animation("frame_file", {
+        "setup": frame_file_setup,
+        "reset": frame_file_reset,
+        "stop": frame_file_stop,
+        "next_step": frame_file_next_step,
+        "render": frame_file_render
+    })
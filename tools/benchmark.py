@@ -0,0 +1,170 @@
+# Benchmark the preset animations on the host (CPython) with the in-memory LED driver
+#
+# Usage:
+#   python tools/benchmark.py
+#   python tools/benchmark.py --lengths 10 300 --presets breath blink
+#   python tools/benchmark.py --save bench.json
+#   python tools/benchmark.py --compare bench.json --tolerance 0.2    # exit 1 if any case is slower
+#   python tools/benchmark.py --kernels compare --output-stage        # speedup of led_animation_kernels per preset
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import led_animation_host
+clock = led_animation_host.install()
+import led_animation_seq
+from led_animation_seq import LedDriverWrapper, LedStripAnimation
+
+DEFAULT_LENGTHS = (10, 100, 1000, 10000)
+
+# attributes used for each preset, so that the heavier code path is measured
+preset_attributes = {
+    "move_down_with_tail": {"active_count": 3, "max_tail_count": 10},
+    "move_up_with_tail": {"active_count": 3, "max_tail_count": 10},
+    "fill_and_move": {"direction": "up", "colors": ((200, 0, 0), (0, 200, 0), (0, 0, 200))},
+    "blink": {"is_alternate": True},
+    "breath": {"is_alternate": True, "step": 10},
+}
+
+# "frame_file" need a file of frames, 16 frames of the strip length
+def frame_file_attributes(led_count):
+    path = os.path.join(tempfile.gettempdir(), "led_animation_benchmark_%d.rgb" % led_count)
+    if (not os.path.exists(path)):
+        with open(path, "wb") as f:
+            for i in range(16):
+                f.write(bytes((i * 16 + j) & 0xFF for j in range(led_count * 3)))
+    return {"file": path, "chunk_size": 4096}
+
+def create_animation(name, led_count, output_stage = False):
+    led_driver = LedDriverWrapper(led_animation_host.HostLedDriver, 0, led_count,
+                                  led_animation_host.host_led_class_callbacks)
+    if (output_stage):
+        led_driver.set_output_stage(brightness = 128, gamma = 2.2)
+    attributes = frame_file_attributes(led_count) if name == "frame_file" else preset_attributes.get(name, {})
+    animation = LedStripAnimation(led_driver, name, attributes)
+    return led_driver, animation
+
+def run_case(name, led_count, min_seconds, max_ticks, output_stage = False, kernels = True):
+    led_animation_seq.use_kernels(kernels)
+    led_driver, animation = create_animation(name, led_count, output_stage)
+    # warm up
+    for i in range(3):
+        animation.trigger_event()
+
+    # speed
+    host_driver = led_driver.led_driver
+    start_bytes = host_driver.bytes_written
+    tick_count = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while (elapsed < min_seconds) and (tick_count < max_ticks):
+        animation.trigger_event()
+        tick_count += 1
+        elapsed = time.perf_counter() - start
+    bytes_written = host_driver.bytes_written - start_bytes
+
+    # allocation, measured separately since tracemalloc slows down the run
+    alloc_ticks = min(tick_count, 20)
+    tracemalloc.start()
+    alloc_bytes = 0
+    alloc_blocks = 0
+    for i in range(alloc_ticks):
+        before_blocks = sys.getallocatedblocks()
+        before_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        animation.trigger_event()
+        alloc_bytes += tracemalloc.get_traced_memory()[1] - before_bytes
+        alloc_blocks += max(sys.getallocatedblocks() - before_blocks, 0)
+    tracemalloc.stop()
+
+    return {
+        "preset": name,
+        "led_count": led_count,
+        "kernels": kernels,
+        "ticks_per_sec": tick_count / elapsed if elapsed > 0 else 0,
+        "us_per_tick": elapsed * 1000000 / tick_count if tick_count > 0 else 0,
+        "alloc_bytes_per_tick": alloc_bytes / alloc_ticks if alloc_ticks > 0 else 0,
+        "alloc_blocks_per_tick": alloc_blocks / alloc_ticks if alloc_ticks > 0 else 0,
+        "bytes_written_per_tick": bytes_written / tick_count if tick_count > 0 else 0,
+    }
+
+def print_results(results):
+    print("%-22s %7s %8s %12s %12s %14s %12s %14s" % ("preset", "leds", "kernels", "ticks/s", "us/tick",
+                                                     "alloc B/tick", "blocks/tick", "written B/tick"))
+    for r in results:
+        print("%-22s %7d %8s %12.1f %12.1f %14.1f %12.1f %14.1f" % (r["preset"], r["led_count"], "on" if r.get("kernels", True) else "off",
+                                                                  r["ticks_per_sec"], r["us_per_tick"], r["alloc_bytes_per_tick"],
+                                                                  r["alloc_blocks_per_tick"], r["bytes_written_per_tick"]))
+
+# speedup of the accelerated kernels, for the results of "--kernels compare"
+def print_speedup(results):
+    python_map = {(r["preset"], r["led_count"]): r for r in results if not r.get("kernels", True)}
+    print("%-22s %7s %14s %14s %9s" % ("preset", "leds", "python us/tick", "kernel us/tick", "speedup"))
+    for r in results:
+        old = python_map.get((r["preset"], r["led_count"]), None)
+        if (not r.get("kernels", True)) or (old is None) or (r["us_per_tick"] <= 0):
+            continue
+        print("%-22s %7d %14.1f %14.1f %8.2fx" % (r["preset"], r["led_count"], old["us_per_tick"],
+                                                r["us_per_tick"], old["us_per_tick"] / r["us_per_tick"]))
+
+# compare with saved results, return the list of cases slower than the tolerance
+def compare_results(results, baseline, tolerance):
+    baseline_map = {(r["preset"], r["led_count"], r.get("kernels", True)): r for r in baseline}
+    regressions = []
+    for r in results:
+        old = baseline_map.get((r["preset"], r["led_count"], r.get("kernels", True)), None)
+        if (old is None) or (old["us_per_tick"] <= 0):
+            continue
+        ratio = r["us_per_tick"] / old["us_per_tick"]
+        if (ratio > 1 + tolerance):
+            regressions.append((r["preset"], r["led_count"], old["us_per_tick"], r["us_per_tick"], ratio))
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark led_animation_seq preset animations on the host")
+    parser.add_argument("--lengths", type = int, nargs = "+", default = DEFAULT_LENGTHS, help = "LED strip lengths")
+    parser.add_argument("--presets", nargs = "+", default = None, help = "preset names, default all registered presets")
+    parser.add_argument("--seconds", type = float, default = 0.2, help = "minimum run time of each case")
+    parser.add_argument("--max-ticks", type = int, default = 100000, help = "maximum ticks of each case")
+    parser.add_argument("--save", default = None, help = "save results as JSON")
+    parser.add_argument("--compare", default = None, help = "compare with results saved by --save")
+    parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed slow down ratio for --compare")
+    parser.add_argument("--kernels", choices = ("on", "off", "compare"), default = "on",
+                        help = "use led_animation_kernels, or run both and show the speedup")
+    parser.add_argument("--output-stage", action = "store_true", help = "write through the brightness and gamma output stage")
+    args = parser.parse_args(argv)
+
+    if (args.kernels != "off") and (not led_animation_seq.use_kernels()):
+        print("led_animation_kernels not available, using the pure Python loops")
+    kernels_options = {"on": (True, ), "off": (False, ), "compare": (False, True)}[args.kernels]
+    presets = args.presets if args.presets is not None else sorted(led_animation_seq.led_animation_mapping_callbacks)
+    results = []
+    for name in presets:
+        for led_count in args.lengths:
+            for kernels in kernels_options:
+                results.append(run_case(name, led_count, args.seconds, args.max_ticks, args.output_stage, kernels))
+    print_results(results)
+    if (args.kernels == "compare"):
+        print_speedup(results)
+
+    if (args.save is not None):
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent = 1)
+    if (args.compare is not None):
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        for preset, led_count, old_us, new_us, ratio in regressions:
+            print("REGRESSION %s (%d LEDs): %.1f us -> %.1f us per tick (x%.2f)" % (preset, led_count, old_us, new_us, ratio))
+        if (len(regressions) > 0):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Encode an animation sequence (JSON list of steps) to the binary file read by LedAnimationSeqFile
+#
+# Usage:
+#   python tools/encode_animation_seq.py show.json show.lseq
+#   python tools/encode_animation_seq.py --dump show.lseq        # print the steps of a binary file
+#
+# show.json:
+#   [["breath", 5000, {"speed": 50, "colors": [200, 0, 0]}],
+#    ["none", 2000]]
+import argparse
+import json
+import os
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import led_animation_host
+led_animation_host.install()
+from led_animation_seq import (compile_animation_seq, LedAnimationSeqFile,
+                               LED_SEQ_FILE_MAGIC, LED_SEQ_FILE_VERSION, LED_SEQ_FILE_HEADER, LED_SEQ_FILE_INDEX)
+
+# encode one attribute value, supported types: None, bool, int, float, str, list / tuple (decoded as tuple), dict with str keys
+# values out of range of the file format raise ValueError
+def encode_value(value, out):
+    if (value is None):
+        out.append(b"N")
+    elif (value is True):
+        out.append(b"T")
+    elif (value is False):
+        out.append(b"F")
+    elif (isinstance(value, int)):
+        if (0 <= value <= 255):
+            out.append(struct.pack("<BB", 0x42, value))
+        elif (-0x80000000 <= value <= 0x7FFFFFFF):
+            out.append(struct.pack("<Bi", 0x69, value))
+        else:
+            raise ValueError("int attribute value %d out of 32 bits range" % value)
+    elif (isinstance(value, float)):
+        try:
+            out.append(struct.pack("<Bf", 0x66, value))
+        except OverflowError:
+            raise ValueError("float attribute value %r out of 32 bits range" % value)
+    elif (isinstance(value, str)):
+        data = value.encode()
+        out.append(struct.pack("<BH", 0x73, check_count(len(data))))
+        out.append(data)
+    elif (isinstance(value, (list, tuple))):
+        out.append(struct.pack("<BH", 0x6C, check_count(len(value))))
+        for item in value:
+            encode_value(item, out)
+    elif (isinstance(value, dict)):
+        out.append(struct.pack("<BH", 0x64, check_count(len(value))))
+        for key in sorted(value):
+            if (not isinstance(key, str)):
+                raise ValueError("attribute key must be str")
+            encode_value(key, out)
+            encode_value(value[key], out)
+    else:
+        raise ValueError("cannot encode attribute value %r" % (value, ))
+
+# size of str and count of list / dict are u16
+def check_count(count):
+    if (count > 0xFFFF):
+        raise ValueError("attribute value is too large (%d)" % count)
+    return count
+
+# write the animation sequence to the binary file "f" (opened as "wb"), the sequence is checked by "compile_animation_seq"
+def encode_animation_seq(animation_seq, f):
+    plan = compile_animation_seq(animation_seq)
+    if (len(plan) > 0xFFFF):
+        raise ValueError("too many steps")
+    records = []
+    for step in plan:
+        if (not 0 <= step.duration <= 0xFFFFFFFF):
+            raise ValueError("duration %d out of range" % step.duration)
+        out = []
+        encode_value(step.animation_type, out)
+        out.append(struct.pack("<I", step.duration))
+        encode_value(step.attributes, out)
+        record = b"".join(out)
+        if (len(record) > 0xFFFF):
+            raise ValueError("step is too large")
+        records.append(record)
+    f.write(struct.pack(LED_SEQ_FILE_HEADER, LED_SEQ_FILE_MAGIC, LED_SEQ_FILE_VERSION, 0, len(records)))
+    offset = struct.calcsize(LED_SEQ_FILE_HEADER) + struct.calcsize(LED_SEQ_FILE_INDEX) * len(records)
+    for record in records:
+        f.write(struct.pack(LED_SEQ_FILE_INDEX, offset, len(record)))
+        offset += len(record)
+    for record in records:
+        f.write(record)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Encode animation sequence to binary file")
+    parser.add_argument("input", help = "JSON animation sequence, or the binary file for --dump")
+    parser.add_argument("output", nargs = "?", default = None, help = "binary animation sequence file")
+    parser.add_argument("--dump", action = "store_true", help = "print the steps of the binary file")
+    args = parser.parse_args(argv)
+
+    if (args.dump):
+        animation_seq = LedAnimationSeqFile(args.input)
+        for i in range(len(animation_seq)):
+            print(i, animation_seq[i])
+        animation_seq.close()
+        return 0
+    if (args.output is None):
+        parser.error("output file is required")
+    with open(args.input) as f:
+        animation_seq = json.load(f)
+    try:
+        with open(args.output, "wb") as f:
+            encode_animation_seq(animation_seq, f)
+    except (ValueError, OverflowError, struct.error) as e:
+        os.remove(args.output)
+        print("invalid animation sequence: %s" % e)
+        return 1
+    print("%d steps, %d bytes" % (len(animation_seq), os.path.getsize(args.output)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+# Host (CPython) shim to run led_animation_seq without a MicroPython board
+#
+# Usage:
+#   import led_animation_host
+#   clock = led_animation_host.install()          # must be called before importing led_animation_seq
+#   from led_animation_seq import LedStripAnimationSeq
+#   seq = LedStripAnimationSeq(0, 20, animation_seq,
+#                              led_class = led_animation_host.HostLedDriver,
+#                              led_class_callbacks = led_animation_host.host_led_class_callbacks)
+#   clock.advance(50)
+#   seq.check_event()
+import sys
+import threading
+import time
+import types
+
+# same as MicroPython, ticks wrap around at 2^30
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+# clock for the MicroPython "time.ticks_*" functions
+# by default the time only moves when "advance" is called, use "real_time = True" to follow the host clock
+class HostClock():
+    def __init__(self, start_ms = 0, real_time = False):
+        self.real_time = real_time
+        self.now_us = start_ms * 1000
+        self.real_start = time.perf_counter()
+
+    def advance(self, ms):
+        self.now_us += int(ms * 1000)
+
+    def advance_us(self, us):
+        self.now_us += int(us)
+
+    def set_ms(self, ms):
+        self.now_us = int(ms * 1000)
+
+    def get_us(self):
+        if (self.real_time):
+            return self.now_us + int((time.perf_counter() - self.real_start) * 1000000)
+        return self.now_us
+
+    def ticks_ms(self):
+        return (self.get_us() // 1000) & TICKS_MAX
+
+    def ticks_us(self):
+        return self.get_us() & TICKS_MAX
+
+    def ticks_cpu(self):
+        return self.ticks_us()
+
+    def ticks_add(self, ticks, delta):
+        return (ticks + delta) & TICKS_MAX
+
+    def ticks_diff(self, ticks1, ticks2):
+        diff = (ticks1 - ticks2) & TICKS_MAX
+        return diff - TICKS_PERIOD if diff >= TICKS_HALFPERIOD else diff
+
+    def sleep_ms(self, ms):
+        if (self.real_time):
+            time.sleep(ms / 1000)
+        else:
+            self.advance(ms)
+
+    def sleep_us(self, us):
+        if (self.real_time):
+            time.sleep(us / 1000000)
+        else:
+            self.advance_us(us)
+
+# in memory LED driver with the same interface as NeoPixel
+class HostLedDriver():
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp = 3, timing = 1):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.timing = timing
+        self.buf = bytearray(n * bpp)
+        # what has been sent to the "LEDs"
+        self.write_count = 0
+        self.bytes_written = 0
+        self.last_frame = bytearray(n * bpp)
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, i, v):
+        offset = i * self.bpp
+        for c in range(self.bpp):
+            self.buf[offset + self.ORDER[c]] = v[c]
+
+    def __getitem__(self, i):
+        offset = i * self.bpp
+        return tuple(self.buf[offset + self.ORDER[c]] for c in range(self.bpp))
+
+    def fill(self, v):
+        b = self.buf
+        l = len(self.buf)
+        bpp = self.bpp
+        for c in range(bpp):
+            value = v[c]
+            j = self.ORDER[c]
+            while j < l:
+                b[j] = value
+                j += bpp
+
+    def write(self):
+        self.write_count += 1
+        self.bytes_written += len(self.buf)
+        self.last_frame[:] = self.buf
+
+# create callback to use HostLedDriver (or any class with the same constructor) without "machine.Pin"
+def host_led_create(led_class, orig_callback, pin_number, led_count):
+    return led_class(pin_number, led_count)
+
+host_led_class_callbacks = {
+    "create": host_led_create,
+}
+
+class HostPin():
+    IN = 0
+    OUT = 1
+
+    def __init__(self, pin_id, mode = -1, *args, **kwargs):
+        self.pin_id = pin_id
+        self.mode = mode
+        self.pin_value = 0
+
+    def value(self, v = None):
+        if (v is None):
+            return self.pin_value
+        self.pin_value = v
+
+# thread based stand-in of machine.Timer, the callback run in the timer thread like an interrupt
+class HostTimer():
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, timer_id = -1, **kwargs):
+        self.timer_id = timer_id
+        self.thread_timer = None
+        self.mode = self.PERIODIC
+        self.period = -1
+        self.callback = None
+        if (len(kwargs) > 0):
+            self.init(**kwargs)
+
+    def init(self, mode = PERIODIC, freq = -1, period = -1, callback = None, **kwargs):
+        self.deinit()
+        self.mode = mode
+        self.period = period if freq <= 0 else 1000 / freq
+        self.callback = callback
+        self.start_thread_timer()
+
+    def start_thread_timer(self):
+        self.thread_timer = threading.Timer(max(self.period, 0) / 1000, self.fire)
+        self.thread_timer.daemon = True
+        self.thread_timer.start()
+
+    def fire(self):
+        thread_timer = self.thread_timer
+        if (self.callback is not None):
+            self.callback(self)
+        # restart only if the callback did not init or deinit the timer
+        if (self.mode == self.PERIODIC) and (self.thread_timer is thread_timer):
+            self.start_thread_timer()
+
+    def deinit(self):
+        if (self.thread_timer is not None):
+            self.thread_timer.cancel()
+            self.thread_timer = None
+
+# lock for the "micropython.schedule" stand-in, hold it in the main code to run without scheduled callbacks
+schedule_lock = threading.RLock()
+
+# stand-in of micropython.schedule, run the callback right away but never at the same time as other callbacks
+def host_schedule(func, arg):
+    with schedule_lock:
+        func(arg)
+
+clock = None
+
+# install the "machine", "neopixel", "micropython" and "time.ticks_*" stand-ins, return the clock
+# use "real_time = True" for machine.Timer
+# modules that already exist (i.e. running on MicroPython) are not replaced
+def install(start_ms = 0, real_time = False):
+    global clock
+    if (clock is None):
+        clock = HostClock(start_ms, real_time)
+    else:
+        clock.real_time = real_time
+        clock.set_ms(start_ms)
+    if ("machine" not in sys.modules):
+        try:
+            import machine
+        except ImportError:
+            machine = types.ModuleType("machine")
+            machine.Pin = HostPin
+            machine.Timer = HostTimer
+            sys.modules["machine"] = machine
+    if ("neopixel" not in sys.modules):
+        try:
+            import neopixel
+        except ImportError:
+            neopixel = types.ModuleType("neopixel")
+            neopixel.NeoPixel = HostLedDriver
+            sys.modules["neopixel"] = neopixel
+    if ("micropython" not in sys.modules):
+        try:
+            import micropython
+        except ImportError:
+            micropython = types.ModuleType("micropython")
+            micropython.schedule = host_schedule
+            micropython.const = lambda value: value
+            sys.modules["micropython"] = micropython
+    if (not hasattr(time, "ticks_ms")) or (getattr(time, "host_clock", None) is not None):
+        # the functions are looked up from the shared clock, so reinstall keeps working
+        # for modules that already imported them
+        time.host_clock = clock
+        time.ticks_ms = lambda: clock.ticks_ms()
+        time.ticks_us = lambda: clock.ticks_us()
+        time.ticks_cpu = lambda: clock.ticks_cpu()
+        time.ticks_add = lambda ticks, delta: clock.ticks_add(ticks, delta)
+        time.ticks_diff = lambda ticks1, ticks2: clock.ticks_diff(ticks1, ticks2)
+        time.sleep_ms = lambda ms: clock.sleep_ms(ms)
+        time.sleep_us = lambda us: clock.sleep_us(us)
+    return clock